@@ -0,0 +1,15 @@
+"""
+Wire format of the Unreal Engine frame datagrams
+Shared by every bridge receiver so the header layout is defined in one place
+"""
+
+import struct
+
+# UDP frame headers, network byte order
+# [uint32 frame_id][uint8 total_chunks][uint8 chunk_index][uint16 payload_size]
+_MJPEG_HDR = struct.Struct('!IBBH')
+# [uint32 frame_id][uint8 total_chunks][uint8 chunk_index][uint8 format][uint16 payload_size][uint16 width][uint16 height]
+_RAW_HDR = struct.Struct('!IBBBHHH')
+
+# JPEG start-of-image marker
+JPEG_SOI = b'\xff\xd8'
@@ -0,0 +1,139 @@
+"""
+Chunked UDP frame reassembly for the bridge frame receivers
+Chunks are scattered straight into pooled buffers and completed frames are
+handed out as memoryviews over them; the consumer hands each buffer back with
+_recycle_frame once the frame has been written, so steady state allocates nothing
+"""
+
+from itertools import islice
+
+# Reusable in-flight frame records and reassembly buffers per receiver
+FRAME_RECORD_POOL_SIZE = 64
+FRAME_BUFFER_POOL_SIZE = 32
+
+def _take_buffer(buffer_pool, size):
+    """Reuse a pooled bytearray large enough for size, or allocate a new one"""
+    while buffer_pool:
+        try:
+            buffer = buffer_pool.pop()
+        except IndexError:
+            break
+        if len(buffer) >= size:
+            return buffer
+    return bytearray(size)
+
+def _store_chunk(frame_info, chunk_index, payload, buffer_pool):
+    """Scatter one chunk into the frame's preallocated buffer.
+
+    Chunks are fixed-size except the last one, so the stride is learned from the
+    first full-size chunk and each payload lands at chunk_index * stride.
+    Returns True once every chunk is present, None if the frame is malformed.
+    """
+    if chunk_index >= frame_info['total_chunks']:
+        return False  # Out-of-range chunk index from the packet header
+    bit = 1 << chunk_index
+    if frame_info['mask'] & bit:
+        return False  # Duplicate chunk
+    
+    last_index = frame_info['total_chunks'] - 1
+    payload_len = len(payload)
+    
+    if frame_info['buffer'] is None:
+        if chunk_index == last_index and last_index > 0:
+            # Stride unknown until a full-size chunk arrives - hold a copy of the
+            # tail since payload may point into a reused receive buffer
+            frame_info['tail'] = bytes(payload)
+            frame_info['mask'] |= bit
+            return False
+        stride = payload_len
+        frame_info['stride'] = stride
+        frame_info['buffer'] = _take_buffer(buffer_pool, stride * frame_info['total_chunks'])
+        frame_info['view'] = memoryview(frame_info['buffer'])
+        tail = frame_info['tail']
+        if tail is not None:
+            if len(tail) > stride:
+                return None
+            offset = last_index * stride
+            frame_info['view'][offset:offset + len(tail)] = tail
+            frame_info['size'] = offset + len(tail)
+            frame_info['tail'] = None
+    
+    stride = frame_info['stride']
+    if payload_len > stride or (chunk_index < last_index and payload_len != stride):
+        return None
+    
+    offset = chunk_index * stride
+    frame_info['view'][offset:offset + payload_len] = payload
+    if chunk_index == last_index:
+        frame_info['size'] = offset + payload_len
+    
+    frame_info['mask'] |= bit
+    return frame_info['mask'] == frame_info['full_mask']
+
+def _new_frame_record(total_chunks, timestamp_ns, record_pool):
+    """In-flight frame state for _store_chunk, recycled from record_pool when possible"""
+    try:
+        frame_info = record_pool.pop()
+    except IndexError:
+        frame_info = {}
+    frame_info.update(
+        buffer=None,
+        view=None,
+        stride=0,
+        size=0,
+        tail=None,
+        mask=0,
+        full_mask=(1 << total_chunks) - 1,
+        total_chunks=total_chunks,
+        timestamp_ns=timestamp_ns
+    )
+    return frame_info
+
+def _release_frame_record(frame_info, record_pool, buffer_pool):
+    """Return a finished or dropped frame's record and unexported buffer to the pools"""
+    if frame_info['buffer'] is not None:
+        buffer_pool.append(frame_info['buffer'])
+    frame_info['buffer'] = frame_info['view'] = frame_info['tail'] = None
+    record_pool.append(frame_info)
+
+def _emit_frame(frame_info, record_pool, buffer_pool):
+    """Hand out a completed frame as a memoryview over its reassembly buffer.
+
+    The consumer now owns the buffer and returns it with _recycle_frame; a
+    frame it never returns (e.g. evicted from a full queue) is simply collected.
+    """
+    frame = frame_info['view'][:frame_info['size']]
+    frame_info['buffer'] = None
+    _release_frame_record(frame_info, record_pool, buffer_pool)
+    return frame
+
+def _recycle_frame(frame, buffer_pool):
+    """Return an emitted frame's buffer to buffer_pool.
+
+    Call only after the last use of frame and of any slice taken from it - the
+    next reassembled frame may overwrite the buffer straight away.
+    """
+    buffer = frame.obj
+    frame.release()
+    buffer_pool.append(buffer)
+
+# Incomplete frames are inserted on their first chunk and never re-inserted, so
+# dict order is arrival order and the oldest frames are always at the front
+
+def _drop_expired_frames(incomplete_frames, cutoff_ns, record_pool, buffer_pool):
+    """Drop frames whose first chunk arrived before cutoff_ns; returns how many were dropped"""
+    expired = []
+    for frame_id, frame_info in incomplete_frames.items():
+        if frame_info['timestamp_ns'] >= cutoff_ns:
+            break
+        expired.append(frame_id)
+    for frame_id in expired:
+        _release_frame_record(incomplete_frames.pop(frame_id), record_pool, buffer_pool)
+    return len(expired)
+
+def _drop_oldest_frames(incomplete_frames, keep_count, record_pool, buffer_pool):
+    """Drop all but the keep_count newest frames; returns how many were dropped"""
+    drop_count = max(len(incomplete_frames) - keep_count, 0)
+    for frame_id in list(islice(incomplete_frames, drop_count)):
+        _release_frame_record(incomplete_frames.pop(frame_id), record_pool, buffer_pool)
+    return drop_count
@@ -0,0 +1,47 @@
+"""
+Logging setup for the bridges
+Records are handed to a background listener thread through a queue, so console
+and log file writes never block the receive and pacing threads
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import time
+
+def configure_queued_logging(handlers, level=logging.INFO,
+                             fmt='%(asctime)s - %(levelname)s - %(message)s'):
+    """Install a QueueHandler on the root logger and drain it into handlers on a listener thread"""
+    formatter = logging.Formatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Flush whatever is still queued on exit
+    return listener
+
+class LogRateLimiter:
+    """Let one message through per interval and count the ones dropped in between"""
+
+    def __init__(self, interval=1.0):
+        self._interval_ns = int(interval * 1_000_000_000)
+        self._next_ns = 0
+        self._dropped = 0
+        self.suppressed = 0  # Messages dropped before the one just allowed
+
+    def allow(self):
+        """True when a message may be logged now"""
+        now = time.monotonic_ns()
+        if now < self._next_ns:
+            self._dropped += 1
+            return False
+        self._next_ns = now + self._interval_ns
+        self.suppressed, self._dropped = self._dropped, 0
+        return True
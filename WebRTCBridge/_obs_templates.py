@@ -0,0 +1,123 @@
+"""
+Shared OBS profile templates for the launch scripts
+Single source for the 1080p30 / 6000 kbps streaming profile, service.json layout
+and the JSON serializer / write helper the scripts write them with
+"""
+
+import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Common streaming profile values
+VIDEO_WIDTH = 1920
+VIDEO_HEIGHT = 1080
+VIDEO_FPS = 30
+VIDEO_BITRATE = 6000
+AUDIO_BITRATE = 160
+AUDIO_SAMPLE_RATE = 48000
+RECORDING_PATH = str(Path.home() / "Videos")
+
+# Profile JSON used by SimpleOBSLauncher; server/key are filled in per call
+DEFAULT_PROFILE_TEMPLATE = {
+    "Output": {
+        "Mode": "Simple",
+        "SimpleOutputPath": RECORDING_PATH,
+        "SimpleOutputVideoBitrate": VIDEO_BITRATE,
+        "SimpleOutputAudioBitrate": AUDIO_BITRATE,
+        "SimpleOutputVideoEncoder": "x264",
+        "SimpleOutputStreamingServer": "",
+        "SimpleOutputStreamingKey": ""
+    },
+    "Video": {
+        "BaseCX": VIDEO_WIDTH,
+        "BaseCY": VIDEO_HEIGHT,
+        "OutputCX": VIDEO_WIDTH,
+        "OutputCY": VIDEO_HEIGHT,
+        "FPSType": "Common",
+        "FPSCommon": str(VIDEO_FPS)
+    },
+    "Audio": {
+        "SampleRate": AUDIO_SAMPLE_RATE,
+        "ChannelSetup": "Stereo",
+        "Desktop1": {
+            "Enabled": True,
+            "Volume": 1.0
+        },
+        "Mic1": {
+            "Enabled": False,
+            "Volume": 0.0
+        }
+    }
+}
+
+# Same profile as basic.ini sections, used by OBSHeadlessSetup
+DEFAULT_PROFILE_INI = {
+    # Output settings
+    'SimpleOutput': {
+        'StreamEncoder': 'x264',
+        'FilePath': RECORDING_PATH,
+        'RecFormat': 'mp4',
+        'VBitrate': str(VIDEO_BITRATE),
+        'ABitrate': str(AUDIO_BITRATE),
+        'UseAdvanced': 'false',
+        'Preset': 'veryfast',
+        'RecQuality': 'Small',
+        'RecEncoder': 'x264'
+    },
+    # Video settings
+    'Video': {
+        'BaseCX': str(VIDEO_WIDTH),
+        'BaseCY': str(VIDEO_HEIGHT),
+        'OutputCX': str(VIDEO_WIDTH),
+        'OutputCY': str(VIDEO_HEIGHT),
+        'FPSType': '0',
+        'FPSCommon': str(VIDEO_FPS),
+        'ScaleType': 'bicubic',
+        'ColorFormat': 'NV12',
+        'ColorSpace': '709',
+        'ColorRange': 'Partial'
+    },
+    # Audio settings
+    'Audio': {
+        'SampleRate': str(AUDIO_SAMPLE_RATE),
+        'ChannelSetup': 'Stereo',
+        'Desktop-1': 'default',
+        'Desktop-2': 'disabled',
+        'Mic-1': 'disabled',
+        'Mic-2': 'disabled',
+        'Mic-3': 'disabled'
+    }
+}
+
+# service.json layout; server and key are filled in per profile
+DEFAULT_SERVICE_TEMPLATE = {
+    "settings": {
+        "server": "",
+        "key": "",
+        "use_auth": False,
+        "bwtest": False
+    },
+    "type": "rtmp_common"
+}
+
+def _dump_json_bytes(obj):
+    """Serialize obj as indented JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode('utf-8')
+
+def _write_if_changed(path, data, force=False):
+    """Write bytes to path unless the file already holds identical content"""
+    path = Path(path)
+    if not force:
+        try:
+            if path.read_bytes() == data:
+                return False
+        except OSError:
+            pass  # Missing or unreadable: write it
+    path.write_bytes(data)
+    return True
@@ -0,0 +1,40 @@
+"""
+Absolute-deadline sleeps for the frame pacing loops
+Uses clock_nanosleep(TIMER_ABSTIME) on Linux so repeated waits don't drift,
+time.sleep on the remaining time elsewhere
+"""
+
+import ctypes
+import sys
+import time
+
+CLOCK_MONOTONIC = 1
+TIMER_ABSTIME = 1
+
+class _timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+def _load_clock_nanosleep():
+    """Return libc clock_nanosleep on Linux, None elsewhere"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        clock_nanosleep = ctypes.CDLL(None, use_errno=True).clock_nanosleep
+    except (OSError, AttributeError):
+        return None
+    clock_nanosleep.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(_timespec), ctypes.c_void_p]
+    clock_nanosleep.restype = ctypes.c_int
+    return clock_nanosleep
+
+_clock_nanosleep = _load_clock_nanosleep()
+
+def _sleep_until_ns(deadline_ns):
+    """Sleep until an absolute time.monotonic_ns() deadline"""
+    if _clock_nanosleep is not None:
+        # Absolute CLOCK_MONOTONIC sleep - same clock as time.monotonic_ns() on Linux, no drift from re-sampling
+        _clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME,
+                         ctypes.byref(_timespec(deadline_ns // 1_000_000_000, deadline_ns % 1_000_000_000)), None)
+        return
+    remaining_ns = deadline_ns - time.monotonic_ns()
+    if remaining_ns > 0:
+        time.sleep(remaining_ns / 1e9)
@@ -0,0 +1,13 @@
+"""
+Pipe writes from the bridges to FFmpeg's stdin
+Frames go to the raw fd as memoryviews, so short writes never copy the frame
+"""
+
+import os
+
+def _write_all(fd, data):
+    """Write a whole frame straight to a pipe fd, handling short writes without copying"""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
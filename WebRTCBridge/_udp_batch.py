@@ -0,0 +1,128 @@
+"""
+Batched UDP receive for the bridge frame receivers
+Sleeps in a selector until data or a wake-up arrives, then drains the socket -
+up to batch_size datagrams per recvmmsg(2) call on Linux, recv_into elsewhere
+"""
+
+import ctypes
+import selectors
+import socket
+import sys
+
+MSG_DONTWAIT = 0x40
+UDP_BUFFER_SIZE = 65536
+
+# Kernel receive buffer for the frame sockets - absorbs chunk bursts while the receive thread is stalled
+UDP_RCVBUF_SIZE = 16 * 1024 * 1024
+
+class _iovec(ctypes.Structure):
+    _fields_ = [
+        ("iov_base", ctypes.c_void_p),
+        ("iov_len", ctypes.c_size_t)
+    ]
+
+class _msghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_iovec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int)
+    ]
+
+class _mmsghdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_hdr", _msghdr),
+        ("msg_len", ctypes.c_uint)
+    ]
+
+def _load_recvmmsg():
+    """Return libc recvmmsg with its signature declared, or None when unavailable"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        recvmmsg = libc.recvmmsg
+    except (OSError, AttributeError):
+        return None
+    recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_mmsghdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    recvmmsg.restype = ctypes.c_int
+    return recvmmsg
+
+class UDPBatchReceiver:
+    """Receive datagrams into preallocated buffers, several per syscall where supported"""
+
+    def __init__(self, sock, batch_size=32, buffer_size=UDP_BUFFER_SIZE):
+        self.sock = sock
+        self.batch_size = batch_size
+        self._buffers = [bytearray(buffer_size) for _ in range(batch_size)]
+        self._views = [memoryview(buffer) for buffer in self._buffers]
+        self._recvmmsg = _load_recvmmsg()
+
+        # Socket stays non-blocking; the selector does all the waiting
+        sock.setblocking(False)
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(sock, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+
+        if self._recvmmsg is not None:
+            self._iovecs = (_iovec * batch_size)()
+            self._msgs = (_mmsghdr * batch_size)()
+            self._c_buffers = []
+            for i, buffer in enumerate(self._buffers):
+                c_buffer = (ctypes.c_char * buffer_size).from_buffer(buffer)
+                self._c_buffers.append(c_buffer)
+                self._iovecs[i].iov_base = ctypes.addressof(c_buffer)
+                self._iovecs[i].iov_len = buffer_size
+                self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iovecs[i])
+                self._msgs[i].msg_hdr.msg_iovlen = 1
+
+    def recv_batch(self, timeout=1.0):
+        """Return the pending datagrams as memoryviews, valid until the next call.
+
+        Sleeps until the socket is readable, wake() is called or timeout expires;
+        the last two return an empty list.
+        """
+        readable = False
+        for key, _ in self._selector.select(timeout):
+            if key.fileobj is self.sock:
+                readable = True
+            else:
+                try:
+                    self._wake_r.recv(64)
+                except BlockingIOError:
+                    pass
+        if not readable:
+            return []
+
+        views = self._views
+        if self._recvmmsg is not None:
+            msgs = self._msgs
+            count = self._recvmmsg(self.sock.fileno(), msgs, self.batch_size, MSG_DONTWAIT, None)
+            # count is -1 (EAGAIN) if the datagram was already consumed
+            return [views[i][:msgs[i].msg_len] for i in range(count)]
+
+        packets = []
+        for i in range(self.batch_size):
+            try:
+                packets.append(views[i][:self.sock.recv_into(self._buffers[i])])
+            except BlockingIOError:
+                break
+        return packets
+
+    def wake(self):
+        """Interrupt a recv_batch() sleeping in the selector"""
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass
+
+    def close(self):
+        """Release the selector and wake-up socket pair (not the UDP socket)"""
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
@@ -0,0 +1,127 @@
+"""
+Win32 process helpers for the OBS launch scripts
+Walks the process table with one Toolhelp32 snapshot instead of psutil, and
+defines what every launcher counts as an Unreal Engine build
+"""
+
+import ctypes
+import re
+from ctypes import wintypes
+
+# Unreal Engine builds, matched against exe names, full image paths and window titles
+UNREAL_NAME_RE = re.compile(r'unreal|ue4|ue5|embody', re.IGNORECASE)
+UNREAL_PATH_RE = re.compile(r'Unreal|UE4|UE5|Embody')
+UNREAL_TITLE_RE = re.compile(r'Unreal|UE4|UE5')
+
+TH32CS_SNAPPROCESS = 0x00000002
+PROCESS_TERMINATE = 0x0001
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+SYNCHRONIZE = 0x00100000
+MAX_PATH = 260
+INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+class PROCESSENTRY32W(ctypes.Structure):
+    _fields_ = [
+        ("dwSize", wintypes.DWORD),
+        ("cntUsage", wintypes.DWORD),
+        ("th32ProcessID", wintypes.DWORD),
+        ("th32DefaultHeapID", ctypes.c_size_t),
+        ("th32ModuleID", wintypes.DWORD),
+        ("cntThreads", wintypes.DWORD),
+        ("th32ParentProcessID", wintypes.DWORD),
+        ("pcPriClassBase", wintypes.LONG),
+        ("dwFlags", wintypes.DWORD),
+        ("szExeFile", wintypes.WCHAR * MAX_PATH)
+    ]
+
+_kernel32 = None
+
+def _get_kernel32():
+    """Load kernel32 once and declare the signatures used here"""
+    global _kernel32
+    if _kernel32 is None:
+        k32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        k32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+        k32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+        k32.Process32FirstW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+        k32.Process32FirstW.restype = wintypes.BOOL
+        k32.Process32NextW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+        k32.Process32NextW.restype = wintypes.BOOL
+        k32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        k32.OpenProcess.restype = wintypes.HANDLE
+        k32.QueryFullProcessImageNameW.argtypes = [wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)]
+        k32.QueryFullProcessImageNameW.restype = wintypes.BOOL
+        k32.TerminateProcess.argtypes = [wintypes.HANDLE, wintypes.UINT]
+        k32.TerminateProcess.restype = wintypes.BOOL
+        k32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        k32.WaitForSingleObject.restype = wintypes.DWORD
+        k32.CloseHandle.argtypes = [wintypes.HANDLE]
+        k32.CloseHandle.restype = wintypes.BOOL
+        _kernel32 = k32
+    return _kernel32
+
+def iter_processes():
+    """Yield (pid, exe_name) for every process in a single snapshot"""
+    kernel32 = _get_kernel32()
+    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+    if not snapshot or snapshot == INVALID_HANDLE_VALUE:
+        return
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        ok = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while ok:
+            yield entry.th32ProcessID, entry.szExeFile
+            ok = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(snapshot)
+
+def find_pids_by_name(name):
+    """Return the PIDs of all processes whose executable name matches (case-insensitive)"""
+    name = name.lower()
+    return [pid for pid, exe in iter_processes() if exe.lower() == name]
+
+def query_image_path(pid):
+    """Return the full executable path of a process, or "" if it cannot be opened"""
+    kernel32 = _get_kernel32()
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return ""
+    try:
+        buf = ctypes.create_unicode_buffer(1024)
+        size = wintypes.DWORD(len(buf))
+        if not kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+            return ""
+        return buf.value
+    finally:
+        kernel32.CloseHandle(handle)
+
+def find_first_process(pattern, path_pattern=None):
+    """Return the first executable name matching a compiled regex, or None
+    
+    When path_pattern is given, a process whose name does not match is also
+    accepted if its full image path matches path_pattern
+    """
+    search = pattern.search
+    for pid, exe in iter_processes():
+        if search(exe):
+            return exe
+        if path_pattern is not None and path_pattern.search(query_image_path(pid)):
+            return exe
+    return None
+
+def terminate_pid(pid, exit_code=1, wait_ms=0):
+    """Terminate a process by PID, optionally waiting up to wait_ms for it to exit"""
+    kernel32 = _get_kernel32()
+    handle = kernel32.OpenProcess(PROCESS_TERMINATE | SYNCHRONIZE, False, pid)
+    if not handle:
+        return False
+    try:
+        if not kernel32.TerminateProcess(handle, exit_code):
+            return False
+        if wait_ms:
+            # Returns as soon as the process is gone rather than after the full timeout
+            kernel32.WaitForSingleObject(handle, wait_ms)
+        return True
+    finally:
+        kernel32.CloseHandle(handle)
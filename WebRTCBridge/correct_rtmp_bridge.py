@@ -9,30 +9,35 @@ import time
 import logging
 import subprocess
 import socket
-import struct
 import threading
-import queue
+from collections import deque
 from dataclasses import dataclass
 import sys
 
 # Configure production-grade logging with UTF-8 encoding
 # Create UTF-8 compatible stream handler
 import io
+from _log_setup import configure_queued_logging, LogRateLimiter
 
 utf8_stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(utf8_stdout),
-        logging.FileHandler('streaming_performance.log', mode='a', encoding='utf-8')
-    ]
-)
+# Handlers run on a listener thread - a slow console or disk never stalls the receive/pacing threads
+configure_queued_logging([
+    logging.StreamHandler(utf8_stdout),
+    logging.FileHandler('streaming_performance.log', mode='a', encoding='utf-8')
+])
 logger = logging.getLogger(__name__)
 
 import os
 from dotenv import load_dotenv
+from _frame_reassembly import (FRAME_RECORD_POOL_SIZE, FRAME_BUFFER_POOL_SIZE,
+                               _store_chunk, _new_frame_record, _release_frame_record, _emit_frame,
+                               _recycle_frame,
+                               _drop_expired_frames, _drop_oldest_frames)
+from _udp_batch import UDPBatchReceiver, UDP_RCVBUF_SIZE
+from _pacing import _sleep_until_ns
+from _pipe_io import _write_all
+from _frame_protocol import _MJPEG_HDR, JPEG_SOI
 
 # Load environment variables
 load_dotenv()
@@ -53,14 +58,18 @@ class ProductionFrameReceiver:
         self.port = port
         self.socket = None
         self.running = False
-        self.frame_queue = queue.Queue(maxsize=50)  # Optimized queue size
+        self.frame_queue = deque(maxlen=50)  # Optimized queue size, oldest drops when full
         self.receive_thread = None
+        self._udp_receiver = None
         
         # Frame reconstruction for chunked UDP packets
         self.incomplete_frames = {}
-        self.frame_timeout = 1.0  # Balanced timeout for reliability vs latency
-        self.last_cleanup = time.time()
+        self.frame_timeout_ns = 1_000_000_000  # Balanced timeout for reliability vs latency
+        self.last_cleanup = time.monotonic_ns()
         self.max_incomplete_frames = 200  # Higher limit but still controlled
+        self._frame_record_pool = deque(maxlen=FRAME_RECORD_POOL_SIZE)
+        self._buffer_pool = deque(maxlen=FRAME_BUFFER_POOL_SIZE)
+        self._error_log_limiter = LogRateLimiter()  # Malformed datagrams can't flood the log
         
         # Statistics tracking
         self.frames_received = 0
@@ -68,9 +77,10 @@ class ProductionFrameReceiver:
         self.frames_completed = 0
         self.frames_dropped = 0
         
-        # Jitter reduction - frame timing control
-        self.last_frame_output_time = 0
+        # Jitter reduction - frame timing control on a monotonic deadline
+        self._next_output_deadline_ns = 0
         self.target_frame_interval = 1.0 / 20.0  # 20fps target for ultra-stability
+        self._frame_interval_ns = int(self.target_frame_interval * 1_000_000_000)
         self.frame_buffer = []  # Small buffer for smoothing
         self.max_buffer_size = 3  # 3-frame buffer
         
@@ -78,8 +88,9 @@ class ProductionFrameReceiver:
         """Start bulletproof frame receiver"""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF_SIZE)
             self.socket.bind(('localhost', self.port))
-            self.socket.settimeout(0.1)  # Non-blocking with short timeout
+            self._udp_receiver = UDPBatchReceiver(self.socket)  # Sleeps until data or stop()
             
             self.running = True
             self.receive_thread = threading.Thread(target=self._receive_loop, daemon=True)
@@ -95,23 +106,22 @@ class ProductionFrameReceiver:
     def _receive_loop(self):
         """Main frame receiving loop with bulletproof error handling"""
         logger.info("Frame receive loop started")
+        receiver = self._udp_receiver
         
         while self.running:
             try:
-                data, addr = self.socket.recvfrom(65536)
-                self.packets_received += 1
-                
-                if len(data) >= 8:
-                    self._process_packet(data)
+                for data in receiver.recv_batch():
+                    self.packets_received += 1
+                    
+                    if len(data) >= _MJPEG_HDR.size:
+                        self._process_packet(data)
                     
                 # Cleanup expired frames to prevent latency buildup
-                current_time = time.time()
-                if current_time - self.last_cleanup > 0.5:  # Clean every 500ms
+                current_time = time.monotonic_ns()
+                if current_time - self.last_cleanup > 500_000_000:  # Clean every 500ms
                     self._cleanup_incomplete_frames(current_time)
                     self.last_cleanup = current_time
                     
-            except socket.timeout:
-                continue  # Normal operation
             except Exception as e:
                 if self.running:
                     logger.error(f"Frame receive error: {e}")
@@ -124,15 +134,14 @@ class ProductionFrameReceiver:
         """Process UDP packet and reconstruct JPEG frame"""
         try:
             # Parse Unreal Engine UDP format: [uint32 frame_id][uint8 total_chunks][uint8 chunk_index][uint16 payload_size][payload]
-            frame_id = struct.unpack('!I', data[0:4])[0]
-            total_chunks = data[4]
-            chunk_index = data[5]
-            payload_size = struct.unpack('!H', data[6:8])[0]
+            frame_id, total_chunks, chunk_index, payload_size = _MJPEG_HDR.unpack_from(data)
             
-            if len(data) < 8 + payload_size:
+            header_size = _MJPEG_HDR.size
+            if len(data) < header_size + payload_size:
                 return
-                
-            payload = data[8:8+payload_size]
+            
+            # Zero-copy slice of the receive buffer; copied once into the reassembly buffer
+            payload = data[header_size:header_size + payload_size]
             
             # Initialize frame tracking
             if frame_id not in self.incomplete_frames:
@@ -140,75 +149,55 @@ class ProductionFrameReceiver:
                 if len(self.incomplete_frames) >= self.max_incomplete_frames:
                     self._aggressive_cleanup()
                 
-                self.incomplete_frames[frame_id] = {
-                    'chunks': {},
-                    'total_chunks': total_chunks,
-                    'timestamp': time.time()
-                }
+                self.incomplete_frames[frame_id] = _new_frame_record(total_chunks, time.monotonic_ns(), self._frame_record_pool)
             
             frame_info = self.incomplete_frames[frame_id]
-            frame_info['chunks'][chunk_index] = payload
+            complete = _store_chunk(frame_info, chunk_index, payload, self._buffer_pool)
+            
+            if complete is None:
+                # Inconsistent chunk sizes - drop frame
+                del self.incomplete_frames[frame_id]
+                _release_frame_record(frame_info, self._frame_record_pool, self._buffer_pool)
+                self.frames_dropped += 1
+                return
             
             # Check if frame is complete
-            if len(frame_info['chunks']) == frame_info['total_chunks']:
-                complete_frame = bytearray()
-                for i in range(frame_info['total_chunks']):
-                    if i in frame_info['chunks']:
-                        complete_frame.extend(frame_info['chunks'][i])
-                    else:
-                        # Missing chunk - drop frame
-                        del self.incomplete_frames[frame_id]
-                        self.frames_dropped += 1
-                        return
+            if complete:
+                del self.incomplete_frames[frame_id]
+                complete_frame = _emit_frame(frame_info, self._frame_record_pool, self._buffer_pool)
                 
                 # Validate JPEG integrity
-                if len(complete_frame) >= 2 and complete_frame[0] == 0xFF and complete_frame[1] == 0xD8:
-                    try:
-                        self.frame_queue.put_nowait(bytes(complete_frame))
-                        self.frames_completed += 1
-                    except queue.Full:
-                        # Replace oldest frame for flow control
-                        try:
-                            self.frame_queue.get_nowait()
-                            self.frame_queue.put_nowait(bytes(complete_frame))
-                        except queue.Empty:
-                            pass
+                if complete_frame[:2] == JPEG_SOI:
+                    # Lock-free handoff - a full deque replaces its oldest frame for flow control
+                    self.frame_queue.append(complete_frame)
+                    self.frames_completed += 1
                 else:
-                    logger.warning(f"Invalid JPEG frame {frame_id}")
                     self.frames_dropped += 1
-                
-                del self.incomplete_frames[frame_id]
+                    if self._error_log_limiter.allow():
+                        logger.warning("Invalid JPEG frame %d (%d similar suppressed)",
+                                       frame_id, self._error_log_limiter.suppressed)
                 
         except Exception as e:
-            logger.error(f"Packet processing error: {e}")
+            if self._error_log_limiter.allow():
+                logger.error("Packet processing error: %s (%d similar suppressed)",
+                             e, self._error_log_limiter.suppressed)
     
     def _cleanup_incomplete_frames(self, current_time):
         """Remove expired incomplete frames"""
-        expired = [fid for fid, info in self.incomplete_frames.items() 
-                  if current_time - info['timestamp'] > self.frame_timeout]
-        for frame_id in expired:
-            del self.incomplete_frames[frame_id]
-            self.frames_dropped += 1
+        self.frames_dropped += _drop_expired_frames(
+            self.incomplete_frames, current_time - self.frame_timeout_ns,
+            self._frame_record_pool, self._buffer_pool
+        )
     
     def _aggressive_cleanup(self):
         """Aggressive cleanup to prevent latency buildup"""
-        # Sort by timestamp and keep only the newest frames
+        # Keep only the newest frames - the oldest are at the front of the arrival-ordered dict
         if len(self.incomplete_frames) >= self.max_incomplete_frames:
-            sorted_frames = sorted(
-                self.incomplete_frames.items(), 
-                key=lambda x: x[1]['timestamp'], 
-                reverse=True
-            )
-            
             # Keep only the newest 75% of frames (less aggressive)
-            frames_to_keep = sorted_frames[:int(self.max_incomplete_frames * 0.75)]
-            frames_to_drop = len(self.incomplete_frames) - len(frames_to_keep)
-            
-            # Clear and rebuild with only recent frames
-            self.incomplete_frames.clear()
-            for frame_id, frame_info in frames_to_keep:
-                self.incomplete_frames[frame_id] = frame_info
-            
+            frames_to_drop = _drop_oldest_frames(
+                self.incomplete_frames, int(self.max_incomplete_frames * 0.75),
+                self._frame_record_pool, self._buffer_pool
+            )
             self.frames_dropped += frames_to_drop
             logger.debug(f"Aggressive cleanup: dropped {frames_to_drop} incomplete frames")
     
@@ -218,34 +207,37 @@ class ProductionFrameReceiver:
             # Fill buffer first
             while len(self.frame_buffer) < self.max_buffer_size:
                 try:
-                    frame = self.frame_queue.get_nowait()
+                    frame = self.frame_queue.popleft()
                     if frame:
                         self.frame_buffer.append(frame)
-                except queue.Empty:
+                except IndexError:
                     break
             
-            # Return frames at consistent intervals
-            current_time = time.time()
-            if self.last_frame_output_time > 0:
-                elapsed = current_time - self.last_frame_output_time
-                if elapsed < self.target_frame_interval:
-                    # Wait for exact timing - ultra-stable 20fps
-                    sleep_time = self.target_frame_interval - elapsed
-                    if sleep_time > 0:
-                        time.sleep(min(sleep_time, 0.01))  # Reduced max delay to 10ms
-                        
-            # Output buffered frame for smooth delivery
+            # Output buffered frame for smooth delivery at consistent intervals
             if self.frame_buffer:
+                deadline = self._next_output_deadline_ns
+                now = time.monotonic_ns()
+                if now < deadline:
+                    # Wait for exact timing - ultra-stable 20fps
+                    _sleep_until_ns(deadline)
+                elif now - deadline > self._frame_interval_ns:
+                    # First frame or fell behind - resync instead of bursting to catch up
+                    deadline = now
+                self._next_output_deadline_ns = deadline + self._frame_interval_ns
+                
                 frame = self.frame_buffer.pop(0)
-                self.last_frame_output_time = time.time()
                 self.frames_received += 1
                 return frame
                 
             return None
             
-        except queue.Empty:
+        except IndexError:
             return None
     
+    def release_frame(self, frame):
+        """Hand a frame's buffer back for reuse once it has been written out"""
+        _recycle_frame(frame, self._buffer_pool)
+    
     def get_statistics(self):
         """Get receiver statistics with accurate success rate"""
         # Calculate accurate success rate based on frames completed vs total frames attempted
@@ -268,10 +260,14 @@ class ProductionFrameReceiver:
     def stop(self):
         """Stop frame receiver"""
         self.running = False
+        if self._udp_receiver:
+            self._udp_receiver.wake()
         if self.socket:
             self.socket.close()
         if self.receive_thread:
             self.receive_thread.join(timeout=2)
+        if self._udp_receiver:
+            self._udp_receiver.close()
         logger.info(f"Frame receiver stopped - Stats: {self.get_statistics()}")
 
 class OptimizedRTMPStreamer:
@@ -531,7 +527,7 @@ class OptimizedRTMPStreamer:
                 ]):
                     self.connection_alive = False
                     self.last_rtmp_error = line_str
-                    logger.warning(f"RTMP connection issue detected: {line_str}")
+                    logger.warning("RTMP connection issue detected: %s", line_str)
                     
                 # Look for successful connection messages
                 elif any(success in line_str.lower() for success in [
@@ -540,15 +536,27 @@ class OptimizedRTMPStreamer:
                     self.connection_alive = True
                     
         except Exception as e:
-            logger.debug(f"Stderr monitoring error: {e}")
+            logger.debug("Stderr monitoring error: %s", e)
+    
+    def send_frame(self, jpeg_data, release=None):
+        """Send JPEG frame with precise timing for A/V sync.
+        
+        release, if given, is called with jpeg_data once the frame has been
+        written or rejected, so its reassembly buffer can be reused.
+        """
+        try:
+            return self._send_jpeg(jpeg_data)
+        finally:
+            if release is not None and jpeg_data is not None:
+                release(jpeg_data)
     
-    def send_frame(self, jpeg_data):
-        """Send JPEG frame with precise timing for A/V sync"""
+    def _send_jpeg(self, jpeg_data):
+        """Pace, validate and write one JPEG frame"""
         if not self.running or not self.process:
             return False
         
         # Initialize timing on first frame
-        if not hasattr(self, 'stream_start_time'):
+        if self.stream_start_time is None:
             self.stream_start_time = time.time()
             self.frame_number = 0
             self.last_frame_time = self.stream_start_time
@@ -574,14 +582,14 @@ class OptimizedRTMPStreamer:
             self.frames_failed += 1
             return False
         
-        if jpeg_data[0] != 0xFF or jpeg_data[1] != 0xD8:
-            logger.error(f"Invalid JPEG header")
+        if jpeg_data[:2] != JPEG_SOI:
+            logger.error("Invalid JPEG header: %s", bytes(jpeg_data[:2]).hex())
             self.frames_failed += 1
             return False
         
         try:
-            self.process.stdin.write(jpeg_data)
-            self.process.stdin.flush()
+            # Unbuffered stdin can return after a partial write - finish the frame on the raw fd
+            _write_all(self.process.stdin.fileno(), jpeg_data)
             self.frames_sent += 1
             self.frame_number += 1
             self.last_frame_time = time.time()
@@ -676,7 +684,7 @@ class ProductionWebRTCBridge:
                 frame_data = self.frame_receiver.get_frame(timeout=0.01)
                 
                 if frame_data and self.rtmp_streamer:
-                    self.rtmp_streamer.send_frame(frame_data)
+                    self.rtmp_streamer.send_frame(frame_data, release=self.frame_receiver.release_frame)
                 
                 # Log statistics every 5 seconds
                 current_time = time.time()
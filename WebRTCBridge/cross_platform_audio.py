@@ -23,15 +23,17 @@ class CrossPlatformAudioCapture:
     def stream_audio_to_pipe(self, pipe):
         """Continuously write raw audio data to a pipe (for FFmpeg stdin)"""
         print("[AUDIO->PIPE] Streaming audio to FFmpeg pipe...")
-        while self.running:
-            audio_data = self.get_audio_data(timeout=0.01)
-            if audio_data:
-                try:
-                    pipe.write(audio_data)
-                    pipe.flush()
-                except Exception as e:
-                    print(f"[ERROR] Audio pipe write error: {e}")
-                    break
+        while True:
+            # Blocks until data arrives; stop_capture() pushes a None sentinel to end the loop
+            audio_data = self.get_audio_data(timeout=None)
+            if audio_data is None:
+                break
+            try:
+                pipe.write(audio_data)
+                pipe.flush()
+            except Exception as e:
+                print(f"[ERROR] Audio pipe write error: {e}")
+                break
     """Cross-platform audio capture using best available method"""
     
     def __init__(self, config: AudioConfig):
@@ -359,6 +361,14 @@ class CrossPlatformAudioCapture:
         
         print(f"[STARTING] Audio capture using {self.method}")
         
+        # Drop what a previous run left behind, including its stop sentinel,
+        # so a new consumer does not exit on the first get
+        while True:
+            try:
+                self.audio_queue.get_nowait()
+            except queue.Empty:
+                break
+        
         self.running = True
         self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
         self.capture_thread.start()
@@ -608,17 +618,31 @@ class CrossPlatformAudioCapture:
         process.terminate()
     
     def get_audio_data(self, timeout=0.001):
-        """Get raw audio data"""
+        """Get raw audio data (timeout=None blocks until data or the stop sentinel)"""
         try:
             return self.audio_queue.get(timeout=timeout)
         except queue.Empty:
             return None
     
+    def put_sentinel(self):
+        """Wake a consumer blocked in get_audio_data(timeout=None) with None"""
+        while True:
+            try:
+                self.audio_queue.put_nowait(None)
+                return
+            except queue.Full:
+                # Make room by discarding the oldest chunk
+                try:
+                    self.audio_queue.get_nowait()
+                except queue.Empty:
+                    pass
+    
     def stop_capture(self):
         """Stop audio capture"""
         self.running = False
         if self.capture_thread:
             self.capture_thread.join(timeout=2)
+        self.put_sentinel()
         print(f"[STOPPED] Audio capture ({self.method})")
 
 class RawAudioStreamer:
@@ -6,11 +6,20 @@ Optimized for blazing fast streaming with minimal delay
 import subprocess
 import json
 import configparser
-import psutil
-import time
+import io
 import os
+import sys
 from pathlib import Path
-import win32con
+from _obs_templates import _write_if_changed
+from _win_process import UNREAL_NAME_RE, UNREAL_PATH_RE
+
+# OBS install and config paths, resolved once at import
+OBS_EXE = Path(r"C:\Program Files (x86)\Steam\steamapps\common\OBS Studio\bin\64bit\obs64.exe")
+OBS_DIR = OBS_EXE.parent
+OBS_CONFIG_DIR = Path(os.environ.get('APPDATA', Path.home())) / "obs-studio"
+BASIC_CONFIG_DIR = OBS_CONFIG_DIR / "basic"
+PROFILES_DIR = BASIC_CONFIG_DIR / "profiles"
+SCENES_DIR = BASIC_CONFIG_DIR / "scenes"
 
 class LivepeerUltraLowStreamer:
     def __init__(self):
@@ -20,51 +29,54 @@ class LivepeerUltraLowStreamer:
         self.playback_url = "https://livepeercdn.studio/hls/7de0lr18mu0sassl/index.m3u8"
         
         # OBS paths
-        self.obs_exe = r"C:\Program Files (x86)\Steam\steamapps\common\OBS Studio\bin\64bit\obs64.exe"
-        self.obs_dir = Path(self.obs_exe).parent
+        self.obs_exe = OBS_EXE
+        self.obs_dir = OBS_DIR
         
         # Config paths
-        self.obs_config_dir = Path(os.environ['APPDATA']) / "obs-studio"
-        self.basic_config_dir = self.obs_config_dir / "basic"
-        self.profiles_dir = self.basic_config_dir / "profiles"
-        self.scenes_dir = self.basic_config_dir / "scenes"
+        self.obs_config_dir = OBS_CONFIG_DIR
+        self.basic_config_dir = BASIC_CONFIG_DIR
+        self.profiles_dir = PROFILES_DIR
+        self.scenes_dir = SCENES_DIR
+        
+        # OBS audio tracks written to the profile
+        self.audio_track_count = 6
+        
+        # Set True for CDNs that insist on padded constant bitrate
+        self.strict_cbr = False
+        
+        # Drop to 30 FPS via OBS WebSocket when the source can't sustain 60
+        self.adaptive_fps = False
         
     def ensure_directories(self):
         """Create OBS config directories"""
-        self.obs_config_dir.mkdir(parents=True, exist_ok=True)
-        self.basic_config_dir.mkdir(parents=True, exist_ok=True)
-        self.profiles_dir.mkdir(parents=True, exist_ok=True)
-        self.scenes_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Create UltraLow profile directory
+        # The two leaf directories cover every parent via parents=True
         profile_dir = self.profiles_dir / "UltraLow"
         profile_dir.mkdir(parents=True, exist_ok=True)
+        self.scenes_dir.mkdir(parents=True, exist_ok=True)
         
         return profile_dir
     
+    def _write_json(self, path, payload):
+        """Write a compact JSON payload in a single write"""
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return _write_if_changed(path, data)
+    
     def create_ultralow_profile(self, profile_dir):
         """Create OBS profile optimized for ultra-low latency"""
         config = configparser.ConfigParser()
         
         # Advanced Output settings for minimal latency
-        config['AdvOut'] = {
-            'Track1Bitrate': '160',
-            'Track1Name': 'Track1', 
-            'Track2Bitrate': '160',
-            'Track2Name': 'Track2',
-            'Track3Bitrate': '160',
-            'Track3Name': 'Track3',
-            'Track4Bitrate': '160',
-            'Track4Name': 'Track4',
-            'Track5Bitrate': '160',
-            'Track5Name': 'Track5',
-            'Track6Bitrate': '160',
-            'Track6Name': 'Track6',
+        advout = {}
+        for i in range(1, self.audio_track_count + 1):
+            advout[f'Track{i}Bitrate'] = '160'
+            advout[f'Track{i}Name'] = f'Track{i}'
+        advout.update({
             'Encoder': 'obs_x264',
             'ApplyServiceSettings': 'true',
             'UseStreamEncoder': 'false',
             'VodTrackIndex': '1'
-        }
+        })
+        config['AdvOut'] = advout
         
         # Ultra-low latency video settings
         config['Video'] = {
@@ -73,8 +85,7 @@ class LivepeerUltraLowStreamer:
             'OutputCX': '1920',
             'OutputCY': '1080',
             'FPSType': '0',
-            'FPSCommon': '60',  # Higher FPS for lower perceived latency
-            'ScaleType': 'bilinear',  # Fastest scaling
+            'FPSCommon': '60',  # Default; adaptive_fps adjusts it before streaming starts
             'ColorFormat': 'NV12',
             'ColorSpace': '709',
             'ColorRange': 'Partial'
@@ -117,10 +128,10 @@ class LivepeerUltraLowStreamer:
         }
         
         basic_ini = profile_dir / "basic.ini"
-        with open(basic_ini, 'w') as f:
-            config.write(f)
-        
-        print(f"Created ultra-low latency profile: {basic_ini}")
+        buf = io.StringIO()
+        config.write(buf)
+        if _write_if_changed(basic_ini, buf.getvalue().encode('utf-8')):
+            print(f"Created ultra-low latency profile: {basic_ini}")
         
         # Create service.json for Livepeer streaming
         service_config = {
@@ -134,10 +145,14 @@ class LivepeerUltraLowStreamer:
         }
         
         service_json = profile_dir / "service.json"
-        with open(service_json, 'w') as f:
-            json.dump(service_config, f, indent=2)
+        if self._write_json(service_json, service_config):
+            print(f"Created Livepeer service config: {service_json}")
         
-        print(f"Created Livepeer service config: {service_json}")
+        # VBR with a capped max rate avoids padding static scenes; CBR is
+        # kept available for ingest endpoints that require it
+        x264opts = "force-cfr=1:keyint=120:min-keyint=60:scenecut=40"  # Adaptive I-frames
+        if self.strict_cbr:
+            x264opts = "nal-hrd=cbr:" + x264opts
         
         # Create streamEncoder.json for x264 ultra-fast preset
         encoder_config = {
@@ -146,11 +161,11 @@ class LivepeerUltraLowStreamer:
                 "preset": "ultrafast",  # Fastest encoding
                 "profile": "baseline",  # Lowest complexity profile
                 "tune": "zerolatency", # Zero latency tuning
-                "x264opts": "nal-hrd=cbr:force-cfr=1:keyint=30:min-keyint=30:scenecut=0:intra-refresh=1",
-                "rate_control": "CBR",  # Constant bitrate for predictable latency
+                "x264opts": x264opts,
+                "rate_control": "CBR" if self.strict_cbr else "VBR",
                 "bitrate": 8000,
                 "buffer_size": 8000,    # Minimal buffering
-                "max_bitrate": 8000,
+                "max_bitrate": 8000 if self.strict_cbr else 9000,  # Headroom for spikes
                 "bf": 0,                # No B-frames for lower latency
                 "crf": 0,
                 "use_bufsize": True
@@ -158,10 +173,8 @@ class LivepeerUltraLowStreamer:
         }
         
         encoder_json = profile_dir / "streamEncoder.json"
-        with open(encoder_json, 'w') as f:
-            json.dump(encoder_config, f, indent=2)
-        
-        print(f"Created ultra-fast encoder config: {encoder_json}")
+        if self._write_json(encoder_json, encoder_config):
+            print(f"Created ultra-fast encoder config: {encoder_json}")
     
     def create_ultralow_scene(self):
         """Create scene collection optimized for game capture"""
@@ -302,45 +315,118 @@ class LivepeerUltraLowStreamer:
         }
         
         scene_file = self.scenes_dir / "UltraLow.json"
-        with open(scene_file, 'w') as f:
-            json.dump(scene_collection, f, indent=2)
-        
-        print(f"Created ultra-low latency scene: {scene_file}")
+        if self._write_json(scene_file, scene_collection):
+            print(f"Created ultra-low latency scene: {scene_file}")
     
-    def kill_obs(self):
-        """Kill any running OBS processes"""
-        for proc in psutil.process_iter(['name']):
+    def _scan_processes(self):
+        """Scan running processes once for OBS and Unreal Engine"""
+        import psutil  # Deferred: only needed when scanning processes
+        
+        obs_pids = []
+        unreal_names = []
+        for proc in psutil.process_iter(['pid', 'name', 'exe']):
             try:
-                if proc.info['name'] == 'obs64.exe':
-                    proc.kill()
-                    print("Stopped existing OBS process")
-                    time.sleep(2)
+                name = proc.info['name'] or ""
+                exe = proc.info['exe'] or ""
+                if name == 'obs64.exe':
+                    obs_pids.append(proc.info['pid'])
+                    continue
+                if UNREAL_NAME_RE.search(name) or UNREAL_PATH_RE.search(exe):
+                    unreal_names.append(name)
             except:
                 pass
+        return obs_pids, unreal_names
     
-    def detect_unreal_engine(self):
-        """Detect Unreal Engine processes"""
-        unreal_processes = []
-        for proc in psutil.process_iter(['name', 'exe']):
+    def kill_obs(self, obs_pids=None):
+        """Kill any running OBS processes"""
+        import psutil
+        
+        if obs_pids is None:
+            obs_pids, _ = self._scan_processes()
+        killed = []
+        for pid in obs_pids:
             try:
-                name = proc.info['name']
-                exe = proc.info['exe'] or ""
-                if any(x in name.lower() for x in ['unreal', 'ue4', 'ue5', 'embody']) or \
-                   any(x in exe for x in ['Unreal', 'UE4', 'UE5', 'Embody']):
-                    unreal_processes.append(name)
+                proc = psutil.Process(pid)
+                proc.kill()
+                killed.append(proc)
+                print("Stopped existing OBS process")
             except:
                 pass
-        return unreal_processes
+        
+        # Wait once for all killed processes instead of sleeping per process
+        if killed:
+            _, alive = psutil.wait_procs(killed, timeout=2)
+            for proc in alive:
+                try:
+                    proc.kill()
+                except:
+                    pass
+    
+    def detect_unreal_engine(self, unreal_names=None):
+        """Detect Unreal Engine processes"""
+        if unreal_names is None:
+            _, unreal_names = self._scan_processes()
+        return unreal_names
+    
+    def match_source_fps(self, connect_retries=30):
+        """Set OBS output FPS from its skipped-frame counts, then start the stream
+        
+        OBS rejects video settings while an output is active, so this runs
+        against an OBS launched without --startstreaming and starts the
+        stream itself once the FPS is set (requires OBS WebSocket).
+        Returns the output FPS, or None if the stream could not be started.
+        """
+        from obs_stream_controller import OBSStreamController
+        
+        controller = OBSStreamController()
+        # OBS needs a few seconds after launch before its WebSocket listens
+        if not controller.connect(retries=connect_retries):
+            return None
+        try:
+            # Keep the profile's 60 FPS if the stats could not be read
+            fps = controller.match_output_fps() or 60
+            if not controller.start_streaming():
+                return None
+            return fps
+        finally:
+            controller.disconnect()
+    
+    def _write_banner(self, lines):
+        """Write a block of console lines in a single write"""
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+    
+    def _launch_obs(self, cmd):
+        """Start OBS with high priority and no console window"""
+        # --minimize-to-tray already handles the OBS window state
+        return subprocess.Popen(
+            cmd,
+            cwd=str(self.obs_dir),
+            creationflags=subprocess.HIGH_PRIORITY_CLASS | subprocess.CREATE_NO_WINDOW
+        )
+    
+    def _stop_process(self, process, timeout=5):
+        """Terminate a launched process, killing it if it does not exit in time"""
+        process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
     
     def launch_ultralow_stream(self):
         """Launch OBS with ultra-low latency configuration"""
         
-        print("=" * 70)
-        print("🚀 LIVEPEER ULTRA-LOW LATENCY STREAMER 🚀")
-        print("=" * 70)
+        self._write_banner([
+            "=" * 70,
+            "🚀 LIVEPEER ULTRA-LOW LATENCY STREAMER 🚀",
+            "=" * 70,
+        ])
+        
+        # Single process scan shared by OBS cleanup and Unreal detection
+        obs_pids, unreal_names = self._scan_processes()
         
         # Kill existing OBS
-        self.kill_obs()
+        self.kill_obs(obs_pids)
         
         # Setup configuration
         print("\n⚙️  Setting up ultra-low latency configuration...")
@@ -349,7 +435,7 @@ class LivepeerUltraLowStreamer:
         self.create_ultralow_scene()
         
         # Detect Unreal Engine
-        unreal_processes = self.detect_unreal_engine()
+        unreal_processes = self.detect_unreal_engine(unreal_names)
         if unreal_processes:
             print(f"\n🎮 Detected Unreal Engine: {', '.join(unreal_processes)}")
         else:
@@ -361,54 +447,67 @@ class LivepeerUltraLowStreamer:
             "--profile", "UltraLow",
             "--collection", "UltraLow", 
             "--minimize-to-tray",
-            "--startstreaming",
             "--disable-updater",
             "--portable"  # Use portable mode for better performance
         ]
+        if not self.adaptive_fps:
+            # With adaptive_fps the stream starts once the FPS is matched
+            cmd.insert(-2, "--startstreaming")
         
-        print(f"\n📡 Streaming to Livepeer:")
-        print(f"   Server: {self.rtmp_server}")
-        print(f"   Stream Key: {self.stream_key}")
-        print(f"   Playback: {self.playback_url}")
+        self._write_banner([
+            "",
+            "📡 Streaming to Livepeer:",
+            f"   Server: {self.rtmp_server}",
+            f"   Stream Key: {self.stream_key}",
+            f"   Playback: {self.playback_url}",
+        ])
         
         try:
-            # Launch minimized with high priority
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = win32con.SW_MINIMIZE
-            
-            process = subprocess.Popen(
-                cmd,
-                cwd=str(self.obs_dir),
-                startupinfo=startupinfo,
-                creationflags=subprocess.HIGH_PRIORITY_CLASS  # High priority for low latency
-            )
-            
-            print(f"\n🔥 ULTRA-LOW LATENCY STREAM ACTIVE! 🔥")
-            print("=" * 70)
-            print("\n⚡ Optimizations Applied:")
-            print("   • x264 ultrafast preset with zero-latency tune")
-            print("   • CBR encoding with minimal buffering")
-            print("   • 60 FPS for smooth motion")
-            print("   • No B-frames for instant encoding")
-            print("   • High priority process")
-            print("   • Instant scene transitions")
-            print("   • Optimized game capture")
+            process = self._launch_obs(cmd)
             
-            print(f"\n📺 Watch your stream at:")
-            print(f"   {self.playback_url}")
+            output_fps = 60
+            if self.adaptive_fps:
+                fps = self.match_source_fps()
+                if fps is None:
+                    # Never leave OBS up without a stream - restart it streaming at the profile FPS
+                    print("\n⚠️  Could not start the stream over OBS WebSocket - restarting OBS with --startstreaming")
+                    self._stop_process(process)
+                    cmd.insert(-2, "--startstreaming")
+                    process = self._launch_obs(cmd)
+                else:
+                    output_fps = fps
             
-            print(f"\n🛑 To stop: Right-click OBS in system tray → Exit")
-            print(f"\n📊 Press Ctrl+C to stop monitoring...")
+            # Status summary is only useful on an interactive console
+            if sys.stdout.isatty():
+                self._write_banner([
+                    "",
+                    "🔥 ULTRA-LOW LATENCY STREAM ACTIVE! 🔥",
+                    "=" * 70,
+                    "",
+                    "⚡ Optimizations Applied:",
+                    "   • x264 ultrafast preset with zero-latency tune",
+                    "   • CBR encoding with minimal buffering" if self.strict_cbr
+                    else "   • Capped VBR encoding with minimal buffering",
+                    f"   • {output_fps} FPS for smooth motion",
+                    "   • No B-frames for instant encoding",
+                    "   • High priority process",
+                    "   • Instant scene transitions",
+                    "   • Optimized game capture",
+                    "",
+                    "📺 Watch your stream at:",
+                    f"   {self.playback_url}",
+                    "",
+                    "🛑 To stop: Right-click OBS in system tray → Exit",
+                    "",
+                    "📊 Press Ctrl+C to stop monitoring...",
+                ])
             
             # Monitor the stream
             try:
-                while process.poll() is None:
-                    time.sleep(5)
+                process.wait()
             except KeyboardInterrupt:
                 print("\n\n🛑 Stopping ultra-low latency stream...")
-                process.terminate()
-                time.sleep(2)
+                self._stop_process(process)
                 print("✅ Stream stopped.")
             
             return True
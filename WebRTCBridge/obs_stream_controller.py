@@ -3,13 +3,32 @@ OBS Stream Controller for Unreal Engine Window and PC Audio
 Captures Unreal Engine window and system audio (without microphone)
 """
 
-import obsws_python as obs
-import pygetwindow as gw
+import ctypes
+from ctypes import wintypes
 import json
 import time
 import subprocess
 import os
 from pathlib import Path
+from _win_process import UNREAL_TITLE_RE
+
+def find_unreal_window():
+    """Return the title of the first top-level Unreal Engine window, or None"""
+    user32 = ctypes.windll.user32
+    WNDENUMPROC = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    result = [None]
+    buf = ctypes.create_unicode_buffer(512)
+    
+    def callback(hwnd, lparam):
+        if user32.GetWindowTextW(hwnd, buf, 512):
+            title = buf.value
+            if UNREAL_TITLE_RE.search(title):
+                result[0] = title
+                return False  # Stop enumerating on first match
+        return True
+    
+    user32.EnumWindows(WNDENUMPROC(callback), 0)
+    return result[0]
 
 class OBSStreamController:
     def __init__(self, host="localhost", port=4455, password=""):
@@ -19,27 +38,36 @@ class OBSStreamController:
         self.password = password
         self.ws = None
         
-    def connect(self):
-        """Connect to OBS WebSocket"""
+    def connect(self, retries=1, retry_delay=1.0):
+        """Connect to OBS WebSocket, retrying while OBS is still starting up"""
         try:
-            self.ws = obs.ReqClient(host=self.host, port=self.port, password=self.password)
-            print("Connected to OBS WebSocket")
-            return True
-        except Exception as e:
+            import obsws_python as obs  # Deferred: heavy websocket import chain
+        except ImportError as e:
             print(f"Failed to connect to OBS: {e}")
             return False
+        
+        for attempt in range(retries):
+            try:
+                self.ws = obs.ReqClient(host=self.host, port=self.port, password=self.password)
+                print("Connected to OBS WebSocket")
+                return True
+            except Exception as e:
+                if attempt == retries - 1:
+                    print(f"Failed to connect to OBS: {e}")
+                    return False
+                time.sleep(retry_delay)
+        return False
     
     def setup_unreal_capture(self):
         """Set up window capture for Unreal Engine"""
         try:
             # Find Unreal Engine window
-            unreal_windows = [w for w in gw.getAllWindows() if 'Unreal' in w.title or 'UE4' in w.title or 'UE5' in w.title]
+            window_title = find_unreal_window()
             
-            if not unreal_windows:
+            if not window_title:
                 print("No Unreal Engine window found. Please make sure Unreal Engine is running.")
                 return False
             
-            window_title = unreal_windows[0].title
             print(f"Found Unreal Engine window: {window_title}")
             
             # Create window capture source
@@ -142,6 +170,29 @@ class OBSStreamController:
             print(f"Error configuring stream: {e}")
             return False
     
+    def match_output_fps(self, width=1920, height=1080, sample_seconds=3.0, max_skipped_ratio=0.05):
+        """Drop output to 30 FPS when OBS keeps missing frames at 60 FPS"""
+        try:
+            # Frames OBS skipped over the sample window, from render lag or output lag
+            before = self.ws.get_stats()
+            time.sleep(sample_seconds)
+            after = self.ws.get_stats()
+            
+            skipped = ((after.render_skipped_frames - before.render_skipped_frames) +
+                       (after.output_skipped_frames - before.output_skipped_frames))
+            rendered = max(after.render_total_frames - before.render_total_frames, 1)
+            skipped_ratio = skipped / rendered
+            
+            fps = 30 if skipped_ratio > max_skipped_ratio else 60
+            self.ws.set_video_settings(fps, 1, width, height, width, height)
+            
+            print(f"Output FPS set to {fps} ({skipped_ratio:.1%} of frames skipped while sampling)")
+            return fps
+            
+        except Exception as e:
+            print(f"Error matching output FPS: {e}")
+            return None
+    
     def start_streaming(self):
         """Start streaming"""
         try:
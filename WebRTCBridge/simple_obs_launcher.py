@@ -3,42 +3,58 @@ Simple OBS Launcher for Unreal Engine Streaming
 Launches OBS with pre-configured settings for capturing Unreal Engine and desktop audio
 """
 
+import functools
 import subprocess
-import json
 import os
 from pathlib import Path
 import pygetwindow as gw
+from _obs_templates import DEFAULT_PROFILE_TEMPLATE, _dump_json_bytes, _write_if_changed
+from _win_process import UNREAL_TITLE_RE
 import time
 
+# Candidate obs64.exe locations, checked in order
+OBS_POSSIBLE_PATHS = (
+    r"C:\Program Files (x86)\Steam\steamapps\common\OBS Studio\bin\64bit\obs64.exe",
+    r"C:\Program Files\obs-studio\bin\64bit\obs64.exe",
+    r"C:\Program Files (x86)\obs-studio\bin\64bit\obs64.exe",
+    r"C:\Program Files\OBS Studio\bin\64bit\obs64.exe",
+    Path.home() / "AppData/Local/Programs/obs-studio/bin/64bit/obs64.exe"
+)
+
+@functools.lru_cache(maxsize=1)
+def _find_obs_installation_cached():
+    """Locate obs64.exe once per process"""
+    for path in OBS_POSSIBLE_PATHS:
+        if Path(path).exists():
+            print(f"Found OBS at: {path}")
+            return str(path)
+    
+    print("OBS installation not found. Please install OBS Studio from https://obsproject.com")
+    return None
+
 class SimpleOBSLauncher:
     def __init__(self):
         self.obs_path = self.find_obs_installation()
         self.config_dir = Path("obs_config")
         self.config_dir.mkdir(exist_ok=True)
+        self._unreal_windows_cache = None
         
     def find_obs_installation(self):
         """Find OBS installation path"""
-        possible_paths = [
-            r"C:\Program Files (x86)\Steam\steamapps\common\OBS Studio\bin\64bit\obs64.exe",
-            r"C:\Program Files\obs-studio\bin\64bit\obs64.exe",
-            r"C:\Program Files (x86)\obs-studio\bin\64bit\obs64.exe",
-            r"C:\Program Files\OBS Studio\bin\64bit\obs64.exe",
-            Path.home() / "AppData/Local/Programs/obs-studio/bin/64bit/obs64.exe"
-        ]
-        
-        for path in possible_paths:
-            if Path(path).exists():
-                print(f"Found OBS at: {path}")
-                return str(path)
-        
-        print("OBS installation not found. Please install OBS Studio from https://obsproject.com")
-        return None
+        return _find_obs_installation_cached()
+    
+    def _get_unreal_windows(self):
+        """Enumerate Unreal Engine windows once and reuse the result"""
+        # Empty results are not cached so a window opened after the first check is found
+        if not self._unreal_windows_cache:
+            self._unreal_windows_cache = [w for w in gw.getAllWindows() if UNREAL_TITLE_RE.search(w.title)]
+        return self._unreal_windows_cache
     
     def create_scene_collection(self):
         """Create OBS scene collection for Unreal Engine streaming"""
         
         # Find Unreal Engine window
-        unreal_windows = [w for w in gw.getAllWindows() if 'Unreal' in w.title or 'UE4' in w.title or 'UE5' in w.title]
+        unreal_windows = self._get_unreal_windows()
         window_title = unreal_windows[0].title if unreal_windows else "Unreal Engine"
         
         scene_collection = {
@@ -75,10 +91,9 @@ class SimpleOBSLauncher:
             ]
         }
         
-        # Save scene collection
+        # Save scene collection (skipped when the file already matches)
         scene_file = self.config_dir / "unreal_stream.json"
-        with open(scene_file, 'w') as f:
-            json.dump(scene_collection, f, indent=2)
+        _write_if_changed(scene_file, _dump_json_bytes(scene_collection))
         
         return scene_file
     
@@ -86,41 +101,17 @@ class SimpleOBSLauncher:
         """Create OBS profile with streaming settings"""
         
         profile = {
+            **DEFAULT_PROFILE_TEMPLATE,
             "Output": {
-                "Mode": "Simple",
-                "SimpleOutputPath": str(Path.home() / "Videos"),
-                "SimpleOutputVideoBitrate": 6000,
-                "SimpleOutputAudioBitrate": 160,
-                "SimpleOutputVideoEncoder": "x264",
+                **DEFAULT_PROFILE_TEMPLATE["Output"],
                 "SimpleOutputStreamingServer": stream_server,
                 "SimpleOutputStreamingKey": stream_key
-            },
-            "Video": {
-                "BaseCX": 1920,
-                "BaseCY": 1080,
-                "OutputCX": 1920,
-                "OutputCY": 1080,
-                "FPSType": "Common",
-                "FPSCommon": "30"
-            },
-            "Audio": {
-                "SampleRate": 48000,
-                "ChannelSetup": "Stereo",
-                "Desktop1": {
-                    "Enabled": True,
-                    "Volume": 1.0
-                },
-                "Mic1": {
-                    "Enabled": False,
-                    "Volume": 0.0
-                }
             }
         }
         
-        # Save profile
+        # Save profile (skipped when the file already matches)
         profile_file = self.config_dir / "unreal_profile.json"
-        with open(profile_file, 'w') as f:
-            json.dump(profile, f, indent=2)
+        _write_if_changed(profile_file, _dump_json_bytes(profile))
         
         return profile_file
     
@@ -179,8 +170,11 @@ def main():
     print("Simple OBS Launcher for Unreal Engine Streaming")
     print("=" * 50)
     
+    # Create launcher
+    launcher = SimpleOBSLauncher()
+    
     # Check if Unreal Engine is running
-    unreal_windows = [w for w in gw.getAllWindows() if 'Unreal' in w.title or 'UE4' in w.title or 'UE5' in w.title]
+    unreal_windows = launcher._get_unreal_windows()
     
     if not unreal_windows:
         print("\nWARNING: No Unreal Engine window detected.")
@@ -191,9 +185,6 @@ def main():
     else:
         print(f"\nDetected Unreal Engine window: {unreal_windows[0].title}")
     
-    # Create launcher
-    launcher = SimpleOBSLauncher()
-    
     # Get user preferences
     print("\nConfiguration:")
     auto_start = input("Auto-start streaming? (y/n): ").lower() == 'y'
@@ -6,19 +6,14 @@ Simple one-click solution to start OBS streaming in background
 import subprocess
 import os
 from pathlib import Path
-import time
-import psutil
+from _win_process import (find_pids_by_name, find_first_process, terminate_pid,
+                          UNREAL_NAME_RE, UNREAL_PATH_RE)
 
 def kill_obs():
     """Kill any running OBS processes"""
-    for proc in psutil.process_iter(['name']):
-        try:
-            if proc.info['name'] == 'obs64.exe':
-                proc.kill()
-                print("Stopped existing OBS process")
-                time.sleep(2)
-        except:
-            pass
+    for pid in find_pids_by_name('obs64.exe'):
+        if terminate_pid(pid, wait_ms=2000):
+            print("Stopped existing OBS process")
 
 def start_headless_obs(stream_key="test", stream_server="rtmp://localhost/live"):
     """Start OBS in headless mode with minimal configuration"""
@@ -38,20 +33,10 @@ def start_headless_obs(stream_key="test", stream_server="rtmp://localhost/live")
     kill_obs()
     
     # Check for Unreal process
-    unreal_found = False
-    for proc in psutil.process_iter(['name', 'exe']):
-        try:
-            name = proc.info['name']
-            exe = proc.info['exe'] or ""
-            if any(x in name.lower() for x in ['unreal', 'ue4', 'ue5', 'embody']) or \
-               any(x in exe for x in ['Unreal', 'UE4', 'UE5', 'Embody']):
-                print(f"✓ Found Unreal Engine: {name}")
-                unreal_found = True
-                break
-        except:
-            pass
-    
-    if not unreal_found:
+    unreal_name = find_first_process(UNREAL_NAME_RE, UNREAL_PATH_RE)
+    if unreal_name:
+        print(f"✓ Found Unreal Engine: {unreal_name}")
+    else:
         print("⚠ No Unreal Engine detected - Will capture entire display")
     
     print("\nStarting OBS in background...")
@@ -67,15 +52,15 @@ def start_headless_obs(stream_key="test", stream_server="rtmp://localhost/live")
     ]
     
     try:
-        # Start minimized
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-        startupinfo.wShowWindow = 6  # SW_MINIMIZE = 6
-        
+        # Detach from this console; --minimize-to-tray handles the window
         process = subprocess.Popen(
             cmd,
             cwd=str(obs_dir),
-            startupinfo=startupinfo
+            creationflags=subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS,
+            close_fds=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
         )
         
         print("\n" + "=" * 60)
@@ -88,14 +73,16 @@ def start_headless_obs(stream_key="test", stream_server="rtmp://localhost/live")
         print("\nTo stop: Right-click OBS icon in system tray → Exit")
         print("\nPress Ctrl+C to stop monitoring...")
         
-        # Monitor process
+        # Block until OBS exits; Ctrl+C is delivered immediately
         try:
-            while process.poll() is None:
-                time.sleep(5)
+            process.wait()
         except KeyboardInterrupt:
             print("\n\nStopping OBS...")
             process.terminate()
-            time.sleep(2)
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                pass
             print("Stopped.")
         
         return True
@@ -6,21 +6,41 @@ Based on WebRTCBridgeComponent.cpp UDP format analysis
 """
 
 import time
+import ctypes
 import logging
+import re
+import os
+import json
+import hashlib
+import shutil
 import subprocess
 import socket
-import struct
 import threading
-import queue
+from collections import deque
 from dataclasses import dataclass
 import sounddevice as sd
 import numpy as np
 import sys
 import platform
 from enum import IntEnum
+from pathlib import Path
 
 # Import cross-platform audio capabilities
 from cross_platform_audio import CrossPlatformAudioCapture, AudioConfig
+from _udp_batch import UDPBatchReceiver, UDP_RCVBUF_SIZE
+from _pacing import _sleep_until_ns
+from _pipe_io import _write_all
+from _frame_protocol import _MJPEG_HDR, _RAW_HDR, JPEG_SOI
+from _frame_reassembly import (FRAME_RECORD_POOL_SIZE, FRAME_BUFFER_POOL_SIZE,
+                               _store_chunk, _new_frame_record, _release_frame_record, _emit_frame,
+                               _recycle_frame,
+                               _drop_expired_frames, _drop_oldest_frames)
+
+# Optional libjpeg-turbo bindings for decoding raw-port JPEGs straight to YUV420
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+except ImportError:
+    TurboJPEG = None
 
 class FrameSyncedAudioCapture:
     """Frame-synced audio - captures exactly 2400 samples per 20fps video frame for 1:1 sync"""
@@ -33,46 +53,49 @@ class FrameSyncedAudioCapture:
         self.samples_per_frame = int(sample_rate / fps)  # 2400 samples per frame at 20fps
         self.running = False
         self.stream = None
-        self.audio_frame_buffer = np.zeros((self.samples_per_frame, channels), dtype=np.float32)
+        # PortAudio delivers 16-bit PCM directly - no float conversion on the audio thread
+        self.audio_frame_buffer = np.zeros((self.samples_per_frame, channels), dtype=np.int16)
         self.buffer_position = 0
-        self.frame_ready_queue = queue.Queue(maxsize=3)
+        self.frame_ready_queue = deque(maxlen=3)  # Oldest frame drops when full
         
     def audio_callback(self, indata, frames, time_info, status):
         """Collect audio into frame-sized chunks that match video timing"""
         if not self.running:
             return
-            
-        # Add incoming audio to frame buffer
-        remaining_space = self.samples_per_frame - self.buffer_position
-        samples_to_copy = min(frames, remaining_space)
         
-        self.audio_frame_buffer[self.buffer_position:self.buffer_position + samples_to_copy] = indata[:samples_to_copy]
-        self.buffer_position += samples_to_copy
-        
-        # When we have a complete frame's worth of audio
-        if self.buffer_position >= self.samples_per_frame:
-            # Convert to 16-bit PCM for FFmpeg
-            audio_frame = (self.audio_frame_buffer * 32767).astype(np.int16)
-            
-            try:
-                # Send complete audio frame (non-blocking)
-                self.frame_ready_queue.put_nowait(audio_frame.tobytes())
-            except queue.Full:
-                # Drop frame if queue full (maintain real-time sync)
-                pass
+        if frames == self.samples_per_frame and self.buffer_position == 0:
+            # Exactly one frame per callback (blocksize) - send straight from indata
+            self.frame_ready_queue.append(indata.tobytes())
+            return
             
-            # Reset buffer for next frame
-            self.buffer_position = 0
-            self.audio_frame_buffer.fill(0)
+        # Add incoming audio to frame buffer, carrying samples past the frame
+        # boundary into the next frame instead of discarding them
+        offset = 0
+        while offset < frames:
+            remaining_space = self.samples_per_frame - self.buffer_position
+            samples_to_copy = min(frames - offset, remaining_space)
+            
+            self.audio_frame_buffer[self.buffer_position:self.buffer_position + samples_to_copy] = indata[offset:offset + samples_to_copy]
+            self.buffer_position += samples_to_copy
+            offset += samples_to_copy
+            
+            # When we have a complete frame's worth of audio
+            if self.buffer_position >= self.samples_per_frame:
+                # Send complete audio frame (non-blocking, maintains real-time sync)
+                self.frame_ready_queue.append(self.audio_frame_buffer.tobytes())
+                
+                # Reset cursor for next frame - every slot is overwritten before the next send
+                self.buffer_position = 0
     
     def start_capture(self):
         """Start frame-synced audio capture"""
         try:
-            # Capture with small blocks for responsiveness but accumulate to frame size
+            # One callback per video frame - frames are only emitted at frame boundaries anyway
             self.stream = sd.InputStream(
                 samplerate=self.sample_rate,
                 channels=self.channels,
-                blocksize=240,  # 5ms blocks for responsiveness
+                blocksize=self.samples_per_frame,
+                dtype='int16',
                 callback=self.audio_callback,
                 device=None,
                 latency='low'
@@ -96,8 +119,8 @@ class FrameSyncedAudioCapture:
     def get_audio_frame(self):
         """Get one complete audio frame that matches video frame timing"""
         try:
-            return self.frame_ready_queue.get_nowait()
-        except queue.Empty:
+            return self.frame_ready_queue.popleft()
+        except IndexError:
             return None
 
 class FrameFormat(IntEnum):
@@ -108,17 +131,15 @@ class FrameFormat(IntEnum):
 # Configure production-grade logging with UTF-8 encoding
 # Create UTF-8 compatible stream handler
 import io
+from _log_setup import configure_queued_logging, LogRateLimiter
 
 utf8_stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(utf8_stdout),
-        logging.FileHandler('streaming_performance.log', mode='a', encoding='utf-8')
-    ]
-)
+# Handlers run on a listener thread - a slow console or disk never stalls the receive/pacing threads
+configure_queued_logging([
+    logging.StreamHandler(utf8_stdout),
+    logging.FileHandler('streaming_performance.log', mode='a', encoding='utf-8')
+])
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -129,17 +150,70 @@ class LivepeerConfig:
     stream_id: str = "7de094b8-3fbe-4b16-ac75-594556d39b18"
     playback_id: str = "7de0lr18mu0sassl"
     rtmp_url: str = "rtmp://rtmp.livepeer.com/live"
+    real_time: bool = False  # Real-time priority for frame threads (MANNEQUIN_REAL_TIME=1, see README)
+
+# Probe order for detect_hardware_encoder
+HARDWARE_ENCODERS = [
+    ('h264_nvenc', 'NVIDIA NVENC'),    # NVIDIA GPUs
+    ('h264_amf', 'AMD AMF'),           # AMD GPUs  
+    ('h264_qsv', 'Intel Quick Sync'),  # Intel iGPU
+    ('libx264', 'Software x264')       # Software fallback
+]
+
+ENCODER_CACHE_FILE = Path.home() / '.cache' / 'mannequin' / 'encoder.json'
+ENCODER_CACHE_TTL = 7 * 24 * 3600  # Re-probe weekly - GPU driver updates don't change the fingerprint
+
+def _encoder_fingerprint():
+    """Identify the machine/ffmpeg combination a cached encoder choice is valid for"""
+    key = '|'.join((
+        platform.node(),
+        platform.machine(),
+        platform.platform(),
+        os.environ.get('CUDA_VISIBLE_DEVICES', ''),
+        shutil.which('ffmpeg') or ''
+    ))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
 
 def detect_hardware_encoder():
-    """Detect best available hardware encoder"""
-    encoders = [
-        ('h264_nvenc', 'NVIDIA NVENC'),    # NVIDIA GPUs
-        ('h264_amf', 'AMD AMF'),           # AMD GPUs  
-        ('h264_qsv', 'Intel Quick Sync'),  # Intel iGPU
-        ('libx264', 'Software x264')       # Software fallback
-    ]
-    
-    for encoder, name in encoders:
+    """Detect best available hardware encoder.
+    
+    MANNEQUIN_FORCE_ENCODER skips detection entirely. Otherwise the result of
+    the ffmpeg probe is cached per machine in ENCODER_CACHE_FILE for ENCODER_CACHE_TTL
+    seconds; delete it to re-probe sooner.
+    """
+    encoder_names = dict(HARDWARE_ENCODERS)
+    
+    forced = os.environ.get('MANNEQUIN_FORCE_ENCODER')
+    if forced:
+        name = encoder_names.get(forced, forced)
+        logger.info(f"Using forced encoder: {name}")
+        return forced, name
+    
+    fingerprint = _encoder_fingerprint()
+    try:
+        cached = json.loads(ENCODER_CACHE_FILE.read_text(encoding='utf-8'))
+        fresh = time.time() - cached.get('ts', 0) < ENCODER_CACHE_TTL
+        if fresh and cached.get('fingerprint') == fingerprint and cached.get('encoder') in encoder_names:
+            name = encoder_names[cached['encoder']]
+            logger.info(f"Using cached encoder: {name}")
+            return cached['encoder'], name
+    except (OSError, ValueError):
+        pass
+    
+    encoder, name = _probe_hardware_encoder()
+    try:
+        ENCODER_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        ENCODER_CACHE_FILE.write_text(
+            json.dumps({'fingerprint': fingerprint, 'encoder': encoder, 'ts': time.time()}),
+            encoding='utf-8'
+        )
+    except OSError as e:
+        logger.debug(f"Could not cache encoder choice: {e}")
+    return encoder, name
+
+def _probe_hardware_encoder():
+    """Probe encoders with a short ffmpeg test encode, best first"""
+    for encoder, name in HARDWARE_ENCODERS:
         try:
             test_cmd = ['ffmpeg', '-hide_banner', '-f', 'lavfi', '-i', 'testsrc=duration=1:size=320x240:rate=1', 
                        '-c:v', encoder, '-t', '1', '-f', 'null', '-']
@@ -154,20 +228,87 @@ def detect_hardware_encoder():
     logger.info("Using software encoder: x264")
     return 'libx264', 'Software x264'
 
+def _load_turbojpeg():
+    """Return a TurboJPEG decoder, or None when PyTurboJPEG or libjpeg-turbo is missing"""
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except (OSError, RuntimeError) as e:
+        logger.warning(f"libjpeg-turbo could not be loaded: {e}")
+        return None
+
+_FRAME_SIZE_RE = re.compile(r'^\s*(\d+)\s*[xX]\s*(\d+)\s*$')
+
+def _raw_frame_settings():
+    """Raw-port settings from MANNEQUIN_RAW_FRAMES / MANNEQUIN_RAW_SIZE as (format, (width, height))
+
+    format is 'jpeg', 'yuv420' or None (raw port off); the size is None unless a
+    valid even WxH was given, since YUV420 needs even dimensions.
+    """
+    raw_format = os.environ.get('MANNEQUIN_RAW_FRAMES', '').strip().lower() or None
+    if raw_format not in (None, 'jpeg', 'yuv420'):
+        logger.warning(f"Ignoring MANNEQUIN_RAW_FRAMES={raw_format!r} - expected 'jpeg' or 'yuv420'")
+        raw_format = None
+    
+    size = None
+    size_value = os.environ.get('MANNEQUIN_RAW_SIZE', '')
+    if size_value:
+        match = _FRAME_SIZE_RE.match(size_value)
+        if match and int(match.group(1)) % 2 == 0 and int(match.group(2)) % 2 == 0:
+            size = (int(match.group(1)), int(match.group(2)))
+        else:
+            logger.warning(f"Ignoring MANNEQUIN_RAW_SIZE={size_value!r} - expected even WIDTHxHEIGHT")
+    
+    if raw_format == 'yuv420' and size is None:
+        logger.warning("MANNEQUIN_RAW_FRAMES=yuv420 needs MANNEQUIN_RAW_SIZE - using the MJPEG port")
+        raw_format = None
+    return raw_format, size
+
+def _pop_frame(frames, ready, timeout):
+    """Pop the oldest frame from a single-consumer deque, waiting up to timeout on ready.
+    
+    timeout=None waits until something (a frame or a None sentinel) is appended.
+    """
+    while True:
+        try:
+            return frames.popleft()
+        except IndexError:
+            pass
+        ready.clear()
+        # Re-check so an append between popleft and clear isn't missed
+        try:
+            return frames.popleft()
+        except IndexError:
+            pass
+        if not ready.wait(timeout):
+            return None
+        if timeout is not None:
+            try:
+                return frames.popleft()
+            except IndexError:
+                return None
+
 class RawFrameReceiver:
     """High-quality raw frame receiver for direct FFmpeg input"""
     
-    def __init__(self, port=5001):
+    def __init__(self, port=5001, real_time=False):
         self.port = port
+        self.real_time = real_time  # Opt-in real-time priority for the receive thread
         self.socket = None
         self.running = False
-        self.raw_frame_queue = queue.Queue(maxsize=10)  # Smaller queue for raw frames
+        self.raw_frame_queue = deque(maxlen=10)  # Smaller queue for raw frames, oldest drops when full
+        self._raw_frame_ready = threading.Event()
         self.receive_thread = None
+        self._udp_receiver = None
         
         # Raw frame reconstruction
         self.incomplete_raw_frames = {}
-        self.raw_frame_timeout = 2.0  # Increased timeout for raw frames (they're larger)
-        self.last_raw_cleanup = time.time()
+        self.raw_frame_timeout_ns = 2_000_000_000  # Increased timeout for raw frames (they're larger)
+        self.last_raw_cleanup = time.monotonic_ns()
+        self._frame_record_pool = deque(maxlen=FRAME_RECORD_POOL_SIZE)
+        self._buffer_pool = deque(maxlen=FRAME_BUFFER_POOL_SIZE)
+        self._error_log_limiter = LogRateLimiter()  # Malformed datagrams can't flood the log
         
         # Statistics
         self.raw_packets_received = 0
@@ -178,11 +319,12 @@ class RawFrameReceiver:
         """Start raw frame receiver"""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF_SIZE)
             self.socket.bind(('localhost', self.port))
-            self.socket.settimeout(0.1)
+            self._udp_receiver = UDPBatchReceiver(self.socket)
             
             self.running = True
-            self.receive_thread = threading.Thread(target=self._receive_raw_loop, daemon=True)
+            self.receive_thread = threading.Thread(target=self._receive_raw_loop, name='udp-recv-raw', daemon=True)
             self.receive_thread.start()
             
             logger.info(f"Raw frame receiver started on port {self.port}")
@@ -195,26 +337,27 @@ class RawFrameReceiver:
     def _receive_raw_loop(self):
         """Main raw frame receiving loop"""
         logger.info("Raw frame receive loop started")
+        if self.real_time:
+            _boost_thread_priority(RECEIVE_THREAD_FIFO_PRIORITY)
+        receiver = self._udp_receiver
         
         while self.running:
             try:
-                data, addr = self.socket.recvfrom(65536)
-                self.raw_packets_received += 1
-                
-                if len(data) >= 12:  # Raw frame header size
-                    self._process_raw_packet(data)
+                for data in receiver.recv_batch():
+                    self.raw_packets_received += 1
+                    
+                    if len(data) >= _RAW_HDR.size:  # Raw frame header size
+                        self._process_raw_packet(data)
                     
                 # Cleanup expired frames
-                current_time = time.time()
-                if current_time - self.last_raw_cleanup > 0.2:  # Clean every 200ms
+                current_time = time.monotonic_ns()
+                if current_time - self.last_raw_cleanup > 200_000_000:  # Clean every 200ms
                     self._cleanup_incomplete_raw_frames(current_time)
                     self.last_raw_cleanup = current_time
                     
-            except socket.timeout:
-                continue
             except Exception as e:
                 if self.running:
-                    logger.error(f"Raw frame receive error: {e}")
+                    logger.error("Raw frame receive error: %s", e)
                     time.sleep(0.001)
         
         logger.info("Raw frame receive loop stopped")
@@ -223,108 +366,91 @@ class RawFrameReceiver:
         """Process raw frame UDP packet"""
         try:
             # Parse raw frame format: [uint32 frame_id][uint8 total_chunks][uint8 chunk_index][uint8 format][uint16 payload_size][uint16 width][uint16 height][payload]
-            frame_id = struct.unpack('!I', data[0:4])[0]
-            total_chunks = data[4]
-            chunk_index = data[5]
-            frame_format = data[6]
-            payload_size = struct.unpack('!H', data[7:9])[0]
-            width = struct.unpack('!H', data[9:11])[0]
-            height = struct.unpack('!H', data[11:13])[0]
-            
-            if len(data) < 13 + payload_size:
+            frame_id, total_chunks, chunk_index, frame_format, payload_size, width, height = _RAW_HDR.unpack_from(data)
+            
+            header_size = _RAW_HDR.size
+            if len(data) < header_size + payload_size:
                 return
-                
-            payload = data[13:13+payload_size]
+            
+            # Zero-copy slice; copied once into the reassembly buffer
+            payload = memoryview(data)[header_size:header_size + payload_size]
             
             # Initialize frame tracking
             if frame_id not in self.incomplete_raw_frames:
                 if len(self.incomplete_raw_frames) >= 20:  # Limit incomplete frames
                     self._aggressive_raw_cleanup()
                 
-                self.incomplete_raw_frames[frame_id] = {
-                    'chunks': {},
-                    'total_chunks': total_chunks,
-                    'format': frame_format,
-                    'width': width,
-                    'height': height,
-                    'timestamp': time.time()
-                }
+                frame_info = _new_frame_record(total_chunks, time.monotonic_ns(), self._frame_record_pool)
+                frame_info['format'] = frame_format
+                frame_info['width'] = width
+                frame_info['height'] = height
+                self.incomplete_raw_frames[frame_id] = frame_info
             
             frame_info = self.incomplete_raw_frames[frame_id]
-            frame_info['chunks'][chunk_index] = payload
+            complete = _store_chunk(frame_info, chunk_index, payload, self._buffer_pool)
+            
+            if complete is None:
+                # Inconsistent chunk sizes - drop frame
+                del self.incomplete_raw_frames[frame_id]
+                _release_frame_record(frame_info, self._frame_record_pool, self._buffer_pool)
+                self.raw_frames_dropped += 1
+                return
             
             # Check if frame is complete
-            if len(frame_info['chunks']) == frame_info['total_chunks']:
-                complete_frame = bytearray()
-                for i in range(frame_info['total_chunks']):
-                    if i in frame_info['chunks']:
-                        complete_frame.extend(frame_info['chunks'][i])
-                    else:
-                        del self.incomplete_raw_frames[frame_id]
-                        self.raw_frames_dropped += 1
-                        return
+            if complete:
+                del self.incomplete_raw_frames[frame_id]
                 
                 # Package complete raw frame
                 raw_frame = {
-                    'data': bytes(complete_frame),
                     'format': frame_info['format'],
                     'width': frame_info['width'],
                     'height': frame_info['height'],
                     'frame_id': frame_id
                 }
+                complete_frame = _emit_frame(frame_info, self._frame_record_pool, self._buffer_pool)
+                raw_frame['data'] = complete_frame
                 
-                try:
-                    self.raw_frame_queue.put_nowait(raw_frame)
-                    self.raw_frames_completed += 1
-                    
-                    # Debug log for raw frame completion
-                    if self.raw_frames_completed % 10 == 0:
-                        logger.info(f"Raw frame completed: {frame_id}, size: {len(complete_frame)} bytes, format: {frame_info['format']}, {frame_info['width']}x{frame_info['height']}")
-                except queue.Full:
-                    # Replace oldest frame
-                    try:
-                        self.raw_frame_queue.get_nowait()
-                        self.raw_frame_queue.put_nowait(raw_frame)
-                    except queue.Empty:
-                        pass
+                self.raw_frame_queue.append(raw_frame)
+                self._raw_frame_ready.set()
+                self.raw_frames_completed += 1
                 
-                del self.incomplete_raw_frames[frame_id]
+                # Debug log for raw frame completion
+                if self.raw_frames_completed % 10 == 0 and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Raw frame completed: %d, size: %d bytes, format: %d, %dx%d",
+                                 frame_id, len(complete_frame), raw_frame['format'], raw_frame['width'], raw_frame['height'])
                 
         except Exception as e:
-            logger.error(f"Raw packet processing error: {e}")
+            if self._error_log_limiter.allow():
+                logger.error("Raw packet processing error: %s (%d similar suppressed)",
+                             e, self._error_log_limiter.suppressed)
     
     def _cleanup_incomplete_raw_frames(self, current_time):
         """Remove expired incomplete raw frames"""
-        expired = [fid for fid, info in self.incomplete_raw_frames.items() 
-                  if current_time - info['timestamp'] > self.raw_frame_timeout]
-        for frame_id in expired:
-            del self.incomplete_raw_frames[frame_id]
-            self.raw_frames_dropped += 1
+        self.raw_frames_dropped += _drop_expired_frames(
+            self.incomplete_raw_frames, current_time - self.raw_frame_timeout_ns,
+            self._frame_record_pool, self._buffer_pool
+        )
     
     def _aggressive_raw_cleanup(self):
         """Aggressive cleanup for raw frames"""
         if len(self.incomplete_raw_frames) >= 20:
-            sorted_frames = sorted(
-                self.incomplete_raw_frames.items(), 
-                key=lambda x: x[1]['timestamp'], 
-                reverse=True
+            # Keep only the 10 newest - they sit at the end of the arrival-ordered dict
+            self.raw_frames_dropped += _drop_oldest_frames(
+                self.incomplete_raw_frames, 10, self._frame_record_pool, self._buffer_pool
             )
-            
-            frames_to_keep = sorted_frames[:10]  # Keep only 10 newest
-            frames_to_drop = len(self.incomplete_raw_frames) - len(frames_to_keep)
-            
-            self.incomplete_raw_frames.clear()
-            for frame_id, frame_info in frames_to_keep:
-                self.incomplete_raw_frames[frame_id] = frame_info
-            
-            self.raw_frames_dropped += frames_to_drop
     
     def get_raw_frame(self, timeout=0.001):
-        """Get next complete raw frame"""
-        try:
-            return self.raw_frame_queue.get(timeout=timeout)
-        except queue.Empty:
-            return None
+        """Get next complete raw frame (timeout=None blocks until a frame or the stop sentinel)"""
+        return _pop_frame(self.raw_frame_queue, self._raw_frame_ready, timeout)
+    
+    def release_frame(self, frame):
+        """Hand a frame's buffer back for reuse once it has been written out"""
+        _recycle_frame(frame, self._buffer_pool)
+    
+    def put_sentinel(self):
+        """Wake a consumer blocked in get_raw_frame(timeout=None) with None"""
+        self.raw_frame_queue.append(None)
+        self._raw_frame_ready.set()
     
     def get_statistics(self):
         """Get raw frame receiver statistics"""
@@ -345,27 +471,37 @@ class RawFrameReceiver:
     def stop(self):
         """Stop raw frame receiver"""
         self.running = False
+        if self._udp_receiver:
+            self._udp_receiver.wake()
         if self.socket:
             self.socket.close()
         if self.receive_thread:
             self.receive_thread.join(timeout=2)
+        if self._udp_receiver:
+            self._udp_receiver.close()
         logger.info(f"Raw frame receiver stopped - Stats: {self.get_statistics()}")
 
 class ProductionFrameReceiver:
     """Production-grade UDP frame receiver with bulletproof reliability"""
     
-    def __init__(self, port=5000):
+    def __init__(self, port=5000, real_time=False):
         self.port = port
+        self.real_time = real_time  # Opt-in real-time priority for the receive thread
         self.socket = None
         self.running = False
-        self.frame_queue = queue.Queue(maxsize=50)  # Optimized queue size
+        self.frame_queue = deque(maxlen=50)  # Optimized queue size, oldest drops when full
+        self._frame_ready = threading.Event()
         self.receive_thread = None
+        self._udp_receiver = None
         
         # Frame reconstruction for chunked UDP packets
         self.incomplete_frames = {}
-        self.frame_timeout = 1.0  # Balanced timeout for reliability vs latency
-        self.last_cleanup = time.time()
+        self.frame_timeout_ns = 1_000_000_000  # Balanced timeout for reliability vs latency
+        self.last_cleanup = time.monotonic_ns()
         self.max_incomplete_frames = 200  # Higher limit but still controlled
+        self._frame_record_pool = deque(maxlen=FRAME_RECORD_POOL_SIZE)
+        self._buffer_pool = deque(maxlen=FRAME_BUFFER_POOL_SIZE)
+        self._error_log_limiter = LogRateLimiter()  # Malformed datagrams can't flood the log
         
         # Statistics tracking
         self.frames_received = 0
@@ -383,11 +519,12 @@ class ProductionFrameReceiver:
         """Start bulletproof frame receiver"""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF_SIZE)
             self.socket.bind(('localhost', self.port))
-            self.socket.settimeout(0.1)  # Non-blocking with short timeout
+            self._udp_receiver = UDPBatchReceiver(self.socket)  # Sleeps until data or stop()
             
             self.running = True
-            self.receive_thread = threading.Thread(target=self._receive_loop, daemon=True)
+            self.receive_thread = threading.Thread(target=self._receive_loop, name='udp-recv-mjpeg', daemon=True)
             self.receive_thread.start()
             
             logger.info(f"Production frame receiver started on port {self.port}")
@@ -400,26 +537,27 @@ class ProductionFrameReceiver:
     def _receive_loop(self):
         """Main frame receiving loop with bulletproof error handling"""
         logger.info("Frame receive loop started")
+        if self.real_time:
+            _boost_thread_priority(RECEIVE_THREAD_FIFO_PRIORITY)
+        receiver = self._udp_receiver
         
         while self.running:
             try:
-                data, addr = self.socket.recvfrom(65536)
-                self.packets_received += 1
-                
-                if len(data) >= 8:
-                    self._process_packet(data)
+                for data in receiver.recv_batch():
+                    self.packets_received += 1
+                    
+                    if len(data) >= _MJPEG_HDR.size:
+                        self._process_packet(data)
                     
                 # Cleanup expired frames to prevent latency buildup
-                current_time = time.time()
-                if current_time - self.last_cleanup > 0.5:  # Clean every 500ms
+                current_time = time.monotonic_ns()
+                if current_time - self.last_cleanup > 500_000_000:  # Clean every 500ms
                     self._cleanup_incomplete_frames(current_time)
                     self.last_cleanup = current_time
                     
-            except socket.timeout:
-                continue  # Normal operation
             except Exception as e:
                 if self.running:
-                    logger.error(f"Frame receive error: {e}")
+                    logger.error("Frame receive error: %s", e)
                     # Don't break - keep trying for bulletproof reliability
                     time.sleep(0.0001)  # Reduced sleep for lower latency
         
@@ -429,15 +567,14 @@ class ProductionFrameReceiver:
         """Process UDP packet and reconstruct JPEG frame"""
         try:
             # Parse Unreal Engine UDP format: [uint32 frame_id][uint8 total_chunks][uint8 chunk_index][uint16 payload_size][payload]
-            frame_id = struct.unpack('!I', data[0:4])[0]
-            total_chunks = data[4]
-            chunk_index = data[5]
-            payload_size = struct.unpack('!H', data[6:8])[0]
+            frame_id, total_chunks, chunk_index, payload_size = _MJPEG_HDR.unpack_from(data)
             
-            if len(data) < 8 + payload_size:
+            header_size = _MJPEG_HDR.size
+            if len(data) < header_size + payload_size:
                 return
-                
-            payload = data[8:8+payload_size]
+            
+            # Zero-copy slice; copied once into the reassembly buffer
+            payload = memoryview(data)[header_size:header_size + payload_size]
             
             # Initialize frame tracking
             if frame_id not in self.incomplete_frames:
@@ -445,90 +582,70 @@ class ProductionFrameReceiver:
                 if len(self.incomplete_frames) >= self.max_incomplete_frames:
                     self._aggressive_cleanup()
                 
-                self.incomplete_frames[frame_id] = {
-                    'chunks': {},
-                    'total_chunks': total_chunks,
-                    'timestamp': time.time()
-                }
+                self.incomplete_frames[frame_id] = _new_frame_record(total_chunks, time.monotonic_ns(), self._frame_record_pool)
             
             frame_info = self.incomplete_frames[frame_id]
-            frame_info['chunks'][chunk_index] = payload
+            complete = _store_chunk(frame_info, chunk_index, payload, self._buffer_pool)
+            
+            if complete is None:
+                # Inconsistent chunk sizes - drop frame
+                del self.incomplete_frames[frame_id]
+                _release_frame_record(frame_info, self._frame_record_pool, self._buffer_pool)
+                self.frames_dropped += 1
+                return
             
             # Check if frame is complete
-            if len(frame_info['chunks']) == frame_info['total_chunks']:
-                complete_frame = bytearray()
-                for i in range(frame_info['total_chunks']):
-                    if i in frame_info['chunks']:
-                        complete_frame.extend(frame_info['chunks'][i])
-                    else:
-                        # Missing chunk - drop frame
-                        del self.incomplete_frames[frame_id]
-                        self.frames_dropped += 1
-                        return
+            if complete:
+                del self.incomplete_frames[frame_id]
+                complete_frame = _emit_frame(frame_info, self._frame_record_pool, self._buffer_pool)
                 
                 # Validate JPEG integrity
-                if len(complete_frame) >= 2 and complete_frame[0] == 0xFF and complete_frame[1] == 0xD8:
-                    try:
-                        self.frame_queue.put_nowait(bytes(complete_frame))
-                        self.frames_completed += 1
-                    except queue.Full:
-                        # Replace oldest frame for flow control
-                        try:
-                            self.frame_queue.get_nowait()
-                            self.frame_queue.put_nowait(bytes(complete_frame))
-                        except queue.Empty:
-                            pass
+                if complete_frame[:2] == JPEG_SOI:
+                    self.frame_queue.append(complete_frame)
+                    self._frame_ready.set()
+                    self.frames_completed += 1
                 else:
-                    logger.warning(f"Invalid JPEG frame {frame_id}")
                     self.frames_dropped += 1
-                
-                del self.incomplete_frames[frame_id]
+                    if self._error_log_limiter.allow():
+                        logger.warning("Invalid JPEG frame %d (%d similar suppressed)",
+                                       frame_id, self._error_log_limiter.suppressed)
                 
         except Exception as e:
-            logger.error(f"Packet processing error: {e}")
+            if self._error_log_limiter.allow():
+                logger.error("Packet processing error: %s (%d similar suppressed)",
+                             e, self._error_log_limiter.suppressed)
     
     def _cleanup_incomplete_frames(self, current_time):
         """Remove expired incomplete frames"""
-        expired = [fid for fid, info in self.incomplete_frames.items() 
-                  if current_time - info['timestamp'] > self.frame_timeout]
-        for frame_id in expired:
-            del self.incomplete_frames[frame_id]
-            self.frames_dropped += 1
+        self.frames_dropped += _drop_expired_frames(
+            self.incomplete_frames, current_time - self.frame_timeout_ns,
+            self._frame_record_pool, self._buffer_pool
+        )
     
     def _aggressive_cleanup(self):
         """Aggressive cleanup to prevent latency buildup"""
-        # Sort by timestamp and keep only the newest frames
+        # Keep only the newest frames - the oldest are at the front of the arrival-ordered dict
         if len(self.incomplete_frames) >= self.max_incomplete_frames:
-            sorted_frames = sorted(
-                self.incomplete_frames.items(), 
-                key=lambda x: x[1]['timestamp'], 
-                reverse=True
-            )
-            
             # Keep only the newest 75% of frames (less aggressive)
-            frames_to_keep = sorted_frames[:int(self.max_incomplete_frames * 0.75)]
-            frames_to_drop = len(self.incomplete_frames) - len(frames_to_keep)
-            
-            # Clear and rebuild with only recent frames
-            self.incomplete_frames.clear()
-            for frame_id, frame_info in frames_to_keep:
-                self.incomplete_frames[frame_id] = frame_info
-            
+            frames_to_drop = _drop_oldest_frames(
+                self.incomplete_frames, int(self.max_incomplete_frames * 0.75),
+                self._frame_record_pool, self._buffer_pool
+            )
             self.frames_dropped += frames_to_drop
-            logger.debug(f"Aggressive cleanup: dropped {frames_to_drop} incomplete frames")
+            logger.debug("Aggressive cleanup: dropped %d incomplete frames", frames_to_drop)
     
     def get_frame(self, timeout=0.001):
         """Get next complete frame without pacing (let sender control timing)"""
-        try:
-            # Get frame immediately without pacing - sender controls timing
-            frame = self.frame_queue.get(timeout=timeout)
-            if frame:
-                self.frames_received += 1
-                return frame
-            return None
-            
-        except queue.Empty:
-            return None
+        # Get frame immediately without pacing - sender controls timing
+        frame = _pop_frame(self.frame_queue, self._frame_ready, timeout)
+        if frame:
+            self.frames_received += 1
+            return frame
+        return None
+    
+    def release_frame(self, frame):
+        """Hand a frame's buffer back for reuse once it has been written out"""
+        _recycle_frame(frame, self._buffer_pool)
     
     def get_statistics(self):
         """Get receiver statistics with accurate success rate"""
@@ -552,23 +669,317 @@ class ProductionFrameReceiver:
     def stop(self):
         """Stop frame receiver"""
         self.running = False
+        if self._udp_receiver:
+            self._udp_receiver.wake()
         if self.socket:
             self.socket.close()
         if self.receive_thread:
             self.receive_thread.join(timeout=2)
+        if self._udp_receiver:
+            self._udp_receiver.close()
         logger.info(f"Frame receiver stopped - Stats: {self.get_statistics()}")
 
+class FrameCadencer:
+    """Feed FFmpeg one frame per 20fps slot whatever rate the sender actually runs at.
+
+    The MJPEG input is timestamped by frame count, so a sender that slows down
+    would stretch stream time behind the audio. A slot that passes without a new
+    frame repeats the last one; a sender running ahead only gets its newest
+    queued frame through. Frames are handed back to the receiver's buffer pool
+    once they can no longer be repeated, or straight away when skipped.
+    """
+    
+    MAX_REPEATS = 20  # Stop filling after 1s of silence and re-anchor on the next real frame
+    
+    def __init__(self, frame_receiver, fps=20):
+        self.frame_receiver = frame_receiver
+        self._interval_ns = 1_000_000_000 // fps
+        self._origin_ns = 0  # Start of slot 0; 0 until the first frame
+        self._slots = 0
+        self._last_frame = None
+        self._repeats = 0
+        
+        # Statistics
+        self.frames_repeated = 0
+        self.frames_skipped = 0
+    
+    def _keep(self, frame):
+        """Make frame the one repeated into empty slots, releasing the previous one"""
+        if self._last_frame is not None:
+            self.frame_receiver.release_frame(self._last_frame)
+        self._last_frame = frame
+    
+    def _newest(self, frame):
+        """Skip past frame to the newest queued one, releasing the frames skipped"""
+        while True:
+            newer = self.frame_receiver.get_frame(timeout=0)
+            if newer is None:
+                return frame
+            self.frame_receiver.release_frame(frame)
+            frame = newer
+            self.frames_skipped += 1
+    
+    def next_frame(self):
+        """Frame for the current slot - new, repeated, or None while waiting for the sender"""
+        if not self._origin_ns:
+            frame = self.frame_receiver.get_frame(timeout=0.01)
+            if frame is not None:
+                # Frames queued before anchoring are as stale as later backlogs
+                frame = self._newest(frame)
+                self._origin_ns = time.monotonic_ns()
+                self._slots = 1
+                self._keep(frame)
+            return frame
+        
+        slot_start_ns = self._origin_ns + self._slots * self._interval_ns
+        now = time.monotonic_ns()
+        if now < slot_start_ns:
+            _sleep_until_ns(slot_start_ns)
+        elif now - slot_start_ns > self._interval_ns:
+            # Fell behind (slow pipe write) - resync instead of bursting repeats to catch up
+            self._origin_ns += now - slot_start_ns
+            slot_start_ns = now
+        
+        # A frame up to one slot late is still sent rather than repeated over
+        remaining_ns = slot_start_ns + self._interval_ns - time.monotonic_ns()
+        frame = self.frame_receiver.get_frame(timeout=max(remaining_ns, 0) / 1e9)
+        self._slots += 1
+        
+        if frame is None:
+            if self._repeats >= self.MAX_REPEATS:
+                self._origin_ns = 0
+                self._keep(None)
+                return None
+            self._repeats += 1
+            self.frames_repeated += 1
+            return self._last_frame
+        
+        # Sender is ahead - skip to the newest queued frame
+        frame = self._newest(frame)
+        
+        self._repeats = 0
+        self._keep(frame)
+        return frame
+
+# FFmpeg stderr classifiers, matched against the lowercased raw bytes line
+_FFMPEG_INPUT_ERROR_RE = re.compile(
+    rb'invalid data found|header missing|no such file|invalid argument|could not find codec|unsupported')
+_FFMPEG_RTMP_ERROR_RE = re.compile(
+    rb'connection refused|connection reset|broken pipe|rtmp server|failed to connect|'
+    rb'connection timed out|server disconnected|connection lost')
+_FFMPEG_CONNECTED_RE = re.compile(rb'stream mapping|press \[q\] to stop|video:')
+_FFMPEG_PROGRESS_RE = re.compile(rb'frame=|fps=|q=|size=|time=|bitrate=|speed=')
+_FFMPEG_KV_RE = re.compile(rb'(\w+)=\s*(\S+)')
+_FFMPEG_PERCENT_RE = re.compile(rb'\((\d+)%')
+
+# Static FFmpeg argument blocks for _build_ffmpeg_command; only the inputs,
+# encoder preset args and rtmp_url vary per stream
+
+# Muxer options ahead of every rtmp_url: packets leave the FLV muxer as soon as they arrive
+_FFMPEG_MUX_ARGS = (
+    '-muxdelay', '0',
+    '-muxpreload', '0',
+    '-max_interleave_delta', '0',  # Strict interleaving
+    '-flush_packets', '1',
+)
+
+# Input options: no demuxer buffering or stream probing before the first packet
+_FFMPEG_LOW_DELAY_INPUT_ARGS = (
+    '-fflags', '+nobuffer',
+    '-flags', 'low_delay',
+    '-probesize', '32',
+    '-analyzeduration', '0',
+)
+
+# WASAPI loopback of the default output device, for FFmpeg builds that ship a wasapi input
+_FFMPEG_WASAPI_LOOPBACK_ARGS = (
+    '-f', 'wasapi',
+    '-sample_rate', '48000',
+    '-channels', '2',
+    *_FFMPEG_LOW_DELAY_INPUT_ARGS,
+    '-thread_queue_size', '8',
+    '-i', 'loopback',
+)
+
+# DirectShow devices that just re-capture the system output, which WASAPI loopback provides directly
+_SYSTEM_OUTPUT_DSHOW_RE = re.compile(r'virtual[- ]audio[- ]capturer|stereo mix', re.IGNORECASE)
+_FFMPEG_WASAPI_DEVICE_RE = re.compile(rb'^\s*D\S*\s+wasapi\b', re.MULTILINE)
+_ffmpeg_wasapi_input = None
+
+def _ffmpeg_has_wasapi_input():
+    """True when the installed FFmpeg lists a wasapi capture device (mainline builds only have dshow)"""
+    global _ffmpeg_wasapi_input
+    if _ffmpeg_wasapi_input is None:
+        try:
+            result = subprocess.run(['ffmpeg', '-hide_banner', '-devices'], capture_output=True, timeout=5)
+            _ffmpeg_wasapi_input = _FFMPEG_WASAPI_DEVICE_RE.search(result.stdout) is not None
+        except (OSError, subprocess.TimeoutExpired):
+            _ffmpeg_wasapi_input = False
+    return _ffmpeg_wasapi_input
+
+_FFMPEG_AAC_ARGS = (
+    # Audio encoding - RTMP standard AAC for system audio output
+    '-c:a', 'aac',
+    '-b:a', '128k',
+    '-ar', '48000',
+    '-ac', '2',
+)
+
+_FFMPEG_HW_CBR_ARGS = (
+    '-profile:v', 'main',        # RTMP standard profile
+    '-level:v', '4.0',
+    '-rc', 'cbr',                # Constant bitrate for RTMP
+    '-b:v', '3000k',
+    '-maxrate', '3000k',
+    '-bufsize', '6000k',
+    '-g', '40',                  # Keyframe every 2 seconds
+    '-keyint_min', '20',
+)
+
+# Audio sync with drift compensation - Combined video and audio
+_FFMPEG_HW_SYNC_FILTER = (
+    '[0:v]format=yuv420p,fps=20,setpts=N/20/TB[v];'
+    '[1:a]aresample=async=1000:min_hard_comp=0.100000:compensate_initial=1[a]'
+)
+
+# AMF takes D3D11 surfaces directly; system-memory frames would go through
+# its extra per-frame staging copy, so upload NV12 once on the filter device
+_FFMPEG_AMF_SYNC_FILTER = (
+    '[0:v]fps=20,setpts=N/20/TB,format=nv12,hwupload=extra_hw_frames=8[v];'
+    '[1:a]aresample=async=1000:min_hard_comp=0.100000:compensate_initial=1[a]'
+)
+
+# D3D11 device for the AMF filter graph's hwupload (global, ahead of the inputs)
+_FFMPEG_AMF_HW_DEVICE_ARGS = (
+    '-init_hw_device', 'd3d11va=amf_d3d11',
+    '-filter_hw_device', 'amf_d3d11',
+)
+
+# AMF / QSV audio + video output, following the encoder args and filter graph
+_FFMPEG_HW_AV_OUTPUT_ARGS = (
+    # Force output framerate
+    '-r', '20',
+    
+    # Map processed streams
+    '-map', '[v]',
+    '-map', '[a]',
+    
+    # RTMP synchronization settings
+    '-vsync', 'cfr',
+    '-async', '1',
+    
+    # FLV container for RTMP
+    '-f', 'flv',
+    '-flvflags', 'no_duration_filesize',
+    '-fflags', '+flush_packets',
+    '-rtmp_live', 'live',
+)
+
+# Software x264 audio + video encode and output
+_FFMPEG_X264_AV_ARGS = (
+    '-c:v', 'libx264',
+    '-preset', 'fast',           # Faster than ultrafast but better quality
+    '-tune', 'zerolatency',
+    '-crf', '18',                # Much higher quality
+    '-maxrate', '6000k',         # Higher bitrate
+    '-bufsize', '3000k',
+    
+    *_FFMPEG_AAC_ARGS,
+    
+    # Use filter_complex for precise sync - Combined video and audio
+    '-filter_complex',
+    '[0:v]format=yuv420p,fps=20,setpts=N/20/TB[v];'
+    '[1:a]aresample=async=1000:min_hard_comp=0.100000:first_pts=0[a]',
+    
+    # Force output framerate
+    '-r', '20',
+    
+    '-map', '[v]',
+    '-map', '[a]',
+    
+    # Synchronization settings for A/V sync
+    '-async', '1',
+    '-vsync', 'cfr',
+    
+    # Ultra-stable x264 parameters
+    '-x264-params', 'aq-mode=0:ref=1:bframes=0:rc-lookahead=0:scenecut=0:keyint=40:min-keyint=20',
+    '-g', '40',
+    '-keyint_min', '20',
+    '-profile:v', 'baseline',
+    '-level', '3.0',
+    
+    # Force frame rate
+    '-r', '20',
+    '-force_fps',
+    
+    # Streaming optimizations with timestamp handling
+    '-f', 'flv',
+    '-flvflags', 'no_duration_filesize+no_metadata',
+    '-fflags', '+flush_packets+genpts+igndts',
+    '-max_delay', '100000',
+    '-rtmp_live', 'live',
+)
+
+# Software x264 video-only encode and output
+_FFMPEG_X264_VIDEO_ONLY_ARGS = (
+    '-c:v', 'libx264',
+    '-preset', 'ultrafast',
+    '-tune', 'zerolatency',
+    '-crf', '30',
+    '-maxrate', '1200k',
+    '-bufsize', '600k',
+    '-vf', 'format=yuv420p',
+    '-r', '20',
+    '-vsync', 'cfr',
+    '-x264-params', 'keyint=40:min-keyint=20:bframes=0',
+    '-f', 'flv',
+    '-flvflags', 'no_duration_filesize',
+    '-fflags', '+genpts',
+)
+
+THREAD_PRIORITY_TIME_CRITICAL = 15
+PACING_THREAD_FIFO_PRIORITY = 10
+RECEIVE_THREAD_FIFO_PRIORITY = 11  # Above pacing - the UDP socket must be drained before frames are paced out
+
+def _boost_thread_priority(fifo_priority=PACING_THREAD_FIFO_PRIORITY):
+    """Best-effort real-time priority for the calling frame receive/pacing/write thread"""
+    try:
+        if sys.platform == 'win32':
+            from ctypes import wintypes
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            kernel32.GetCurrentThread.restype = wintypes.HANDLE
+            kernel32.SetThreadPriority.argtypes = [wintypes.HANDLE, ctypes.c_int]
+            kernel32.SetThreadPriority.restype = wintypes.BOOL
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_TIME_CRITICAL)
+        elif hasattr(os, 'sched_setscheduler'):
+            # Linux scheduling calls act on the calling thread for pid 0; needs CAP_SYS_NICE
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(fifo_priority))
+    except (OSError, AttributeError) as e:
+        logger.debug(f"Thread priority unchanged: {e}")
+
+def _decode_line(line):
+    """Decode an FFmpeg stderr fragment for logging"""
+    return line.decode('utf-8', errors='ignore')
+
 class OptimizedRTMPStreamer:
     """Production-grade RTMP streamer with hardware acceleration and raw frame support"""
     
-    def __init__(self, rtmp_url, audio_config: AudioConfig = None):
+    def __init__(self, rtmp_url, audio_config: AudioConfig = None, real_time=False):
         self.rtmp_url = rtmp_url
+        self.real_time = real_time  # Opt-in real-time priority, see LivepeerConfig
         self.audio_config = audio_config or AudioConfig()
         self.process = None
+        self._stdin_fd = None  # Raw FFmpeg stdin fd for frame writes
         self.running = False
         
         # Hardware acceleration
         self.encoder, self.encoder_name = detect_hardware_encoder()
+        self.encoder_args = self._preset_args_for(self.encoder)
+        
+        # Frame pacing (monotonic ns; 0 until the first frame is sent)
+        self.last_frame_time_ns = 0
+        self._target_interval_ns = 50_000_000  # 50ms per frame at 20fps
+        self.frame_number = 0
         
         # Statistics
         self.frames_sent = 0
@@ -577,22 +988,51 @@ class OptimizedRTMPStreamer:
         self.audio_chunks_sent = 0
         self.start_time = time.time()
         
+        # FFmpeg liveness, flipped once by the exit watcher instead of polled per frame
+        self._ffmpeg_alive = False
+        self._ffmpeg_rc = None
+        self.ffmpeg_wait_thread = None
+        
         # RTMP connection monitoring
         self.stderr_thread = None
         self.connection_alive = True
         self.last_rtmp_error = None
         
+        # Sliding window of FFmpeg audio buffer fill levels
+        self.audio_buffer_stats = deque(maxlen=10)
+        self._audio_buffer_sum = 0
+        
         # Audio streaming
         self.audio_capture = None
         self.audio_thread = None
         self.enable_audio = False
         self.audio_device = None  # Store detected audio device
+        self.audio_temp_fh = None  # Temp-file sink written by the audio callback
         
-        # Raw frame support
+        # Raw frame support (port 5001) - opt in via MANNEQUIN_RAW_FRAMES, see README
         self.raw_frame_receiver = None
         self.raw_frame_thread = None
-        self.use_raw_frames = False
-        
+        self.raw_frame_format, raw_size = _raw_frame_settings()
+        self.use_raw_frames = self.raw_frame_format is not None
+        # (width, height) of the YUV420 input: raw-port YUV420, or its JPEGs decoded by libjpeg-turbo
+        self.raw_yuv_size = raw_size if self.use_raw_frames else None
+        self._turbojpeg = None
+        self._jpeg_process = None
+        self._last_ffmpeg_error = b''  # Last non-empty stderr line, raw bytes
+        
+    @staticmethod
+    def _preset_args_for(encoder):
+        """Low-latency preset/tuning flags for a hardware encoder (no lookahead, no encode queue)"""
+        if 'nvenc' in encoder:
+            # p1 + ull is the current-SDK spelling of the old llhq/ull low-latency preset
+            return ['-preset', 'p1', '-tune', 'ull', '-zerolatency', '1', '-delay', '0', '-rc-lookahead', '0']
+        if 'amf' in encoder:
+            # Short output poll so each frame is collected as soon as it is encoded
+            return ['-usage', 'ultralowlatency', '-quality', 'speed', '-query_timeout', '50']
+        if 'qsv' in encoder:
+            return ['-preset', 'veryfast', '-look_ahead', '0', '-async_depth', '1']
+        return []
+    
     def _select_audio_device(self):
         """Select audio device with proper component separation - each component does what it's designed for"""
         try:
@@ -826,18 +1266,16 @@ class OptimizedRTMPStreamer:
             
             self.sounddevice_running = True
             
-            # Create/clear the temporary audio file
-            with open(self.audio_temp_file, 'wb') as f:
-                pass  # Create empty file
+            # Create/clear the temporary audio file and keep it open for the callback.
+            # Unbuffered, so each block reaches the file with one write() as before
+            audio_temp_fh = open(self.audio_temp_file, 'wb', buffering=0)
+            self.audio_temp_fh = audio_temp_fh
             
             def audio_callback(indata, frames, time, status):
                 if self.sounddevice_running:
                     try:
-                        # Convert to bytes and write to temp file
-                        audio_bytes = indata.astype('int16').tobytes()
-                        # Append to file for continuous streaming
-                        with open(self.audio_temp_file, 'ab') as f:
-                            f.write(audio_bytes)
+                        # Stream is already int16 - append its buffer for continuous streaming
+                        audio_temp_fh.write(indata)
                     except Exception as e:
                         logger.debug(f"Audio write error: {e}")
             
@@ -857,6 +1295,9 @@ class OptimizedRTMPStreamer:
             
         except Exception as e:
             logger.error(f"Failed to start Line In capture: {e}")
+            if self.audio_temp_fh:
+                self.audio_temp_fh.close()
+                self.audio_temp_fh = None
             return False
         
         return True
@@ -869,6 +1310,9 @@ class OptimizedRTMPStreamer:
             if hasattr(self, 'audio_stream'):
                 self.audio_stream.stop()
                 self.audio_stream.close()
+            if self.audio_temp_fh:
+                self.audio_temp_fh.close()  # Stream is stopped, so no callback can still write
+                self.audio_temp_fh = None
             
             # Clean up temp file
             if hasattr(self, 'audio_temp_file'):
@@ -891,12 +1335,19 @@ class OptimizedRTMPStreamer:
         
         # Start raw frame receiver if enabled
         if self.use_raw_frames:
-            self.raw_frame_receiver = RawFrameReceiver(port=5001)
+            self.raw_frame_receiver = RawFrameReceiver(port=5001, real_time=self.real_time)
             if not self.raw_frame_receiver.start():
                 logger.warning("Raw frame receiver failed - falling back to MJPEG")
                 self.use_raw_frames = False
             else:
                 logger.info("Raw frame receiver started - High quality mode enabled")
+                if self.raw_frame_format == 'jpeg' and self.raw_yuv_size:
+                    # JPEGs arriving on the raw port get decoded here instead of by FFmpeg's MJPEG decoder
+                    self._turbojpeg = _load_turbojpeg()
+                    if self._turbojpeg is None:
+                        # Without a decoder the JPEGs can only go to FFmpeg's MJPEG input
+                        logger.warning("PyTurboJPEG unavailable - raw-port JPEGs use the MJPEG input")
+                        self.raw_yuv_size = None
         
         # Audio is handled directly by FFmpeg DirectShow - no separate capture needed
         if enable_audio:
@@ -914,12 +1365,19 @@ class OptimizedRTMPStreamer:
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                bufsize=0  # Unbuffered for minimum latency
+                bufsize=0,  # Unbuffered for minimum latency
+                creationflags=subprocess.HIGH_PRIORITY_CLASS if self.real_time and sys.platform == 'win32' else 0
             )
+            self._stdin_fd = self.process.stdin.fileno()
+            self._ffmpeg_alive = True
             
             self.running = True
             self.start_time = time.time()
             
+            # One blocking wait on FFmpeg's exit instead of a poll() per frame
+            self.ffmpeg_wait_thread = threading.Thread(target=self._wait_ffmpeg, daemon=True)
+            self.ffmpeg_wait_thread.start()
+            
             # Start stderr monitoring thread to detect RTMP connection issues
             self.stderr_thread = threading.Thread(target=self._monitor_ffmpeg_stderr, daemon=True)
             self.stderr_thread.start()
@@ -938,133 +1396,148 @@ class OptimizedRTMPStreamer:
             logger.error(f"Failed to start RTMP stream: {e}")
             return False
     
+    def _wait_ffmpeg(self):
+        """Block until FFmpeg exits, then mark the stream as no longer running"""
+        self._ffmpeg_rc = self.process.wait()
+        self._ffmpeg_alive = False
+        if self.running:
+            logger.error(f"FFmpeg exited unexpectedly with return code: {self._ffmpeg_rc}")
+        self.running = False
+    
     def _monitor_ffmpeg_stderr(self):
         """Monitor FFmpeg stderr for RTMP connection issues"""
         if not self.process or not self.process.stderr:
             return
+        
+        # INFO-level lines are skipped (no parsing or decoding) when INFO is filtered out
+        log_info = logger.isEnabledFor(logging.INFO)
             
         try:
             while self.running and self.process:
                 line = self.process.stderr.readline()
                 if not line:
                     break
-                    
-                line_str = line.decode('utf-8', errors='ignore').strip()
+                
+                # Classify on raw bytes with one lowercase pass; decode only what gets logged
+                line = line.strip()
+                if not line:
+                    continue
                 
                 # Store last error for debugging
-                if line_str:
-                    self._last_ffmpeg_error = line_str
+                self._last_ffmpeg_error = line
+                lower = line.lower()
                 
                 # Look for input format errors
-                if any(error in line_str.lower() for error in [
-                    'invalid data found', 'header missing', 'no such file',
-                    'invalid argument', 'could not find codec', 'unsupported'
-                ]):
-                    logger.error(f"FFmpeg input error: {line_str}")
+                if _FFMPEG_INPUT_ERROR_RE.search(lower):
+                    logger.error("FFmpeg input error: %s", _decode_line(line))
                 
                 # Look for RTMP connection errors
-                elif any(error in line_str.lower() for error in [
-                    'connection refused', 'connection reset', 'broken pipe',
-                    'rtmp server', 'failed to connect', 'connection timed out',
-                    'server disconnected', 'connection lost'
-                ]):
+                elif _FFMPEG_RTMP_ERROR_RE.search(lower):
+                    line_str = _decode_line(line)
                     self.connection_alive = False
                     self.last_rtmp_error = line_str
-                    logger.warning(f"RTMP connection issue detected: {line_str}")
+                    logger.warning("RTMP connection issue detected: %s", line_str)
                     
                 # Look for successful connection messages
-                elif any(success in line_str.lower() for success in [
-                    'stream mapping', 'press [q] to stop', 'video:'
-                ]):
+                elif _FFMPEG_CONNECTED_RE.search(lower):
                     self.connection_alive = True
                     
                 # Log video quality metrics
-                elif any(metric in line_str.lower() for metric in [
-                    'frame=', 'fps=', 'q=', 'size=', 'time=', 'bitrate=', 'speed='
-                ]):
+                elif _FFMPEG_PROGRESS_RE.search(lower):
+                    if not log_info:
+                        continue
                     # Parse and log detailed video metrics for quality optimization
-                    if 'frame=' in line_str and 'fps=' in line_str:
-                        parts = line_str.split()
-                        frame_data = {}
-                        for part in parts:
-                            if '=' in part:
-                                key, value = part.split('=', 1)
-                                frame_data[key] = value
-                        
-                        # Log detailed quality metrics every 100 frames
-                        if 'frame' in frame_data:
-                            try:
-                                frame_num = int(frame_data['frame'])
-                                if frame_num % 100 == 0:
-                                    logger.info(f"🎥 VIDEO QUALITY: Frame {frame_data.get('frame', 'N/A')}, "
-                                              f"FPS {frame_data.get('fps', 'N/A')}, "
-                                              f"Quality {frame_data.get('q', 'N/A')}, "
-                                              f"Size {frame_data.get('size', 'N/A')}, "
-                                              f"Speed {frame_data.get('speed', 'N/A')}")
-                            except:
-                                pass
-                    logger.info(f"FFmpeg: {line_str}")
+                    frame_data = dict(_FFMPEG_KV_RE.findall(lower))
+                    frame_value = frame_data.get(b'frame')
+                    
+                    # Log detailed quality metrics every 100 frames
+                    if frame_value and frame_value.isdigit() and b'fps' in frame_data and int(frame_value) % 100 == 0:
+                        logger.info("🎥 VIDEO QUALITY: Frame %s, FPS %s, Quality %s, Size %s, Speed %s",
+                                    *(_decode_line(frame_data.get(key, b'N/A'))
+                                      for key in (b'frame', b'fps', b'q', b'size', b'speed')))
+                    logger.info("FFmpeg: %s", _decode_line(line))
                 
                 # Log audio sync issues with detailed analysis and recovery tracking
-                elif 'buffer' in line_str.lower() and 'audio' in line_str.lower():
+                elif b'buffer' in lower and b'audio' in lower:
                     # Extract buffer percentage for sync analysis
-                    if '%' in line_str:
-                        try:
-                            percent_start = line_str.find('(') + 1
-                            percent_end = line_str.find('%')
-                            if percent_start > 0 and percent_end > percent_start:
-                                buffer_percent = int(line_str[percent_start:percent_end])
-                                
-                                # Track audio buffer health for sync optimization
-                                if hasattr(self, 'audio_buffer_stats'):
-                                    self.audio_buffer_stats.append(buffer_percent)
-                                    if len(self.audio_buffer_stats) > 10:
-                                        self.audio_buffer_stats.pop(0)
-                                    avg_buffer = sum(self.audio_buffer_stats) / len(self.audio_buffer_stats)
-                                else:
-                                    self.audio_buffer_stats = [buffer_percent]
-                                    avg_buffer = buffer_percent
-                                
-                                if buffer_percent >= 95:
-                                    logger.error(f"🔊 CRITICAL AUDIO OVERFLOW: {buffer_percent}% (avg: {avg_buffer:.1f}%)")
-                                elif buffer_percent >= 80:
-                                    logger.warning(f"🔊 AUDIO SYNC WARNING: {buffer_percent}% (avg: {avg_buffer:.1f}%)")
-                                elif buffer_percent <= 50:
-                                    logger.info(f"✅ AUDIO DISPOSAL WORKING: {buffer_percent}% (avg: {avg_buffer:.1f}%)")
-                                else:
-                                    logger.info(f"🔊 AUDIO BUFFER: {buffer_percent}% (avg: {avg_buffer:.1f}%)")
-                        except:
-                            pass
+                    percent_match = _FFMPEG_PERCENT_RE.search(lower)
+                    if percent_match:
+                        buffer_percent = int(percent_match.group(1))
+                        
+                        # Track audio buffer health for sync optimization (running sum, O(1) eviction)
+                        stats = self.audio_buffer_stats
+                        if len(stats) == stats.maxlen:
+                            self._audio_buffer_sum -= stats[0]
+                        stats.append(buffer_percent)
+                        self._audio_buffer_sum += buffer_percent
+                        avg_buffer = self._audio_buffer_sum / len(stats)
+                        
+                        if buffer_percent >= 95:
+                            logger.error("🔊 CRITICAL AUDIO OVERFLOW: %d%% (avg: %.1f%%)", buffer_percent, avg_buffer)
+                        elif buffer_percent >= 80:
+                            logger.warning("🔊 AUDIO SYNC WARNING: %d%% (avg: %.1f%%)", buffer_percent, avg_buffer)
+                        elif buffer_percent <= 50:
+                            logger.info("✅ AUDIO DISPOSAL WORKING: %d%% (avg: %.1f%%)", buffer_percent, avg_buffer)
+                        else:
+                            logger.info("🔊 AUDIO BUFFER: %d%% (avg: %.1f%%)", buffer_percent, avg_buffer)
                     # Check for DirectShow buffer management messages
-                    elif 'dshow' in line_str.lower() and ('too full' in line_str.lower() or 'dropped' in line_str.lower()):
-                        if 'frame dropped' in line_str.lower():
-                            logger.info(f"🗑️ AUDIO FRAME DISPOSED: {line_str.split(']')[-1].strip()}")
-                        elif 'too full' in line_str.lower():
+                    elif b'dshow' in lower and (b'too full' in lower or b'dropped' in lower):
+                        if b'frame dropped' in lower:
+                            if log_info:
+                                logger.info("🗑️ AUDIO FRAME DISPOSED: %s", _decode_line(line.rsplit(b']', 1)[-1].strip()))
+                        elif b'too full' in lower:
                             # Extract buffer percentage from DirectShow message
-                            if '(' in line_str and '%' in line_str:
-                                try:
-                                    pct_start = line_str.find('(') + 1
-                                    pct_end = line_str.find('%')
-                                    if pct_start > 0 and pct_end > pct_start:
-                                        buffer_pct = line_str[pct_start:pct_end]
-                                        logger.warning(f"🔄 DIRECTSHOW BUFFER: {buffer_pct}% - Auto-disposing frames")
-                                except:
-                                    logger.warning(f"🔄 DIRECTSHOW BUFFER MANAGEMENT: {line_str}")
-                        else:
-                            logger.info(f"🔄 DIRECTSHOW: {line_str}")
+                            pct_match = _FFMPEG_PERCENT_RE.search(lower)
+                            if pct_match:
+                                logger.warning("🔄 DIRECTSHOW BUFFER: %s%% - Auto-disposing frames", _decode_line(pct_match.group(1)))
+                            else:
+                                logger.warning("🔄 DIRECTSHOW BUFFER MANAGEMENT: %s", _decode_line(line))
+                        elif log_info:
+                            logger.info("🔄 DIRECTSHOW: %s", _decode_line(line))
                     else:
-                        logger.warning(f"🔊 AUDIO ISSUE: {line_str}")
+                        logger.warning("🔊 AUDIO ISSUE: %s", _decode_line(line))
                 
                 # Log any error message
-                elif 'error' in line_str.lower() or 'failed' in line_str.lower():
-                    logger.error(f"FFmpeg: {line_str}")
+                elif b'error' in lower or b'failed' in lower:
+                    logger.error("FFmpeg: %s", _decode_line(line))
                     
                 # Log all FFmpeg output for debugging RTMP issues
-                else:
-                    logger.info(f"FFmpeg: {line_str}")
+                elif log_info:
+                    logger.info("FFmpeg: %s", _decode_line(line))
                     
         except Exception as e:
-            logger.debug(f"Stderr monitoring error: {e}")
+            logger.debug("Stderr monitoring error: %s", e)
+    
+    def _video_input_args(self):
+        """FFmpeg input args for the frames written to stdin"""
+        # AMF with audio uploads frames to a D3D11 device inside the filter graph
+        hw_device = _FFMPEG_AMF_HW_DEVICE_ARGS if 'amf' in self.encoder and self.enable_audio and self.audio_device else ()
+        if self.use_raw_frames and self.raw_yuv_size:
+            # Raw YUV420 skips the MJPEG decode before re-encoding
+            width, height = self.raw_yuv_size
+            return [
+                *hw_device,
+                '-f', 'rawvideo',
+                '-pix_fmt', 'yuv420p',
+                '-video_size', f'{width}x{height}',
+                '-framerate', '20',
+                *_FFMPEG_LOW_DELAY_INPUT_ARGS,
+                '-i', 'pipe:0'
+            ]
+        return [
+            *hw_device,
+            '-f', 'image2pipe',
+            '-vcodec', 'mjpeg',
+            '-framerate', '20',  # Explicitly set input framerate
+            *_FFMPEG_LOW_DELAY_INPUT_ARGS,
+            '-i', 'pipe:0'
+        ]
+    
+    def _nvenc_video_filter(self):
+        """NVENC video filter - raw YUV420 is uploaded straight to the GPU"""
+        if self.use_raw_frames and self.raw_yuv_size:
+            return 'fps=20,hwupload_cuda'
+        return 'format=yuv420p,fps=20'
     
     def _build_ffmpeg_command(self):
         """Build hardware-accelerated FFmpeg command with proper audio sync"""
@@ -1089,11 +1562,8 @@ class OptimizedRTMPStreamer:
                 cmd = [
                     'ffmpeg', '-y',
                     
-                    # Video input: MJPEG frames from Unreal Engine  
-                    '-f', 'image2pipe',
-                    '-vcodec', 'mjpeg',
-                    '-framerate', '20',
-                    '-i', 'pipe:0',
+                    # Video input: MJPEG or raw YUV420 frames from Unreal Engine
+                    *self._video_input_args(),
                 ]
                 
                 logger.info("WASAPI Line In detected - audio capture active but using video-only streaming")
@@ -1108,41 +1578,50 @@ class OptimizedRTMPStreamer:
                 # Extract DirectShow device name
                 dshow_device = self.audio_device[6:]  # Remove "DSHOW:" prefix
                 
-                # Using DirectShow
-                cmd = [
-                    'ffmpeg', '-y',
-                    
-                    # Video input: MJPEG frames from Unreal Engine
-                    '-f', 'image2pipe',
-                    '-vcodec', 'mjpeg',
-                    '-framerate', '20',  # Explicitly set input framerate
-                    '-i', 'pipe:0',
-                    
-                    # Audio input: DirectShow optimized for SYSTEM AUDIO OUTPUT capture
-                    '-f', 'dshow',  # Match video framerate
-                    '-audio_buffer_size', '50',      # 10ms buffer for steady output capture
-                    '-rtbufsize', '1024k',            # 2KB buffer - accommodate system audio output rate
-                    '-probesize', '128',             # Small probe for quick startup
-                    '-analyzeduration', '10',       # Quick analysis for system audio
-                    '-fflags', '+flush_packets',     # Immediate packet flushing
-                    '-thread_queue_size', '8',      # Reasonable queue for output stream
-                    '-i', f'audio={dshow_device}',  # Use detected DirectShow audio device
-                ]
+                if _SYSTEM_OUTPUT_DSHOW_RE.search(dshow_device) and _ffmpeg_has_wasapi_input():
+                    # Same system output via WASAPI loopback: engine-timestamped, no DirectShow buffer quantum
+                    logger.info(f"Capturing system audio via WASAPI loopback instead of DirectShow '{dshow_device}'")
+                    cmd = [
+                        'ffmpeg', '-y',
+                        
+                        # Video input: MJPEG or raw YUV420 frames from Unreal Engine
+                        *self._video_input_args(),
+                        
+                        # Audio input: WASAPI loopback of the default output device
+                        *_FFMPEG_WASAPI_LOOPBACK_ARGS,
+                    ]
+                else:
+                    # Using DirectShow
+                    cmd = [
+                        'ffmpeg', '-y',
+                        
+                        # Video input: MJPEG or raw YUV420 frames from Unreal Engine
+                        *self._video_input_args(),
+                        
+                        # Audio input: DirectShow optimized for SYSTEM AUDIO OUTPUT capture
+                        '-f', 'dshow',  # Match video framerate
+                        '-audio_buffer_size', '50',      # 10ms buffer for steady output capture
+                        '-rtbufsize', '1024k',            # 2KB buffer - accommodate system audio output rate
+                        '-probesize', '32',              # Minimal probe for quick startup
+                        '-analyzeduration', '0',         # No stream analysis delay
+                        '-fflags', '+flush_packets+nobuffer',  # Immediate packet flushing, no input buffering
+                        '-flags', 'low_delay',
+                        '-thread_queue_size', '8',      # Reasonable queue for output stream
+                        '-i', f'audio={dshow_device}',  # Use detected DirectShow audio device
+                    ]
             else:
                 # Fallback for legacy format (no prefix)
                 cmd = [
                     'ffmpeg', '-y',
                     
-                    # Video input: MJPEG frames from Unreal Engine
-                    '-f', 'image2pipe',
-                    '-vcodec', 'mjpeg',
-                    '-framerate', '20',
-                    '-i', 'pipe:0',
+                    # Video input: MJPEG or raw YUV420 frames from Unreal Engine
+                    *self._video_input_args(),
                     
                     # Audio input: DirectShow fallback
                     '-f', 'dshow',
                     '-audio_buffer_size', '20',
                     '-rtbufsize', '64k',
+                    *_FFMPEG_LOW_DELAY_INPUT_ARGS,
                     '-i', f'audio={self.audio_device}',
                 ]
             
@@ -1161,8 +1640,7 @@ class OptimizedRTMPStreamer:
                 cmd.extend([
                     # Video encoding - RTMP compatible H.264 NVENC
                     '-c:v', 'h264_nvenc',
-                    '-preset', 'p3',  # Use p3 preset (faster than 'fast')
-                    '-tune', 'll',    # Low latency tuning
+                    *self.encoder_args,  # Ultra-low-latency preset, zero encode delay
                     '-profile:v', 'main',
                     '-level:v', '4.0',
                     '-rc', 'cbr',
@@ -1179,7 +1657,7 @@ class OptimizedRTMPStreamer:
                     # WASAPI Line In detected - using video-only mode for stability
                     cmd.extend([
                         # Video processing only (stable approach)
-                        '-vf', 'format=yuv420p,fps=20',
+                        '-vf', self._nvenc_video_filter(),
                         '-r', '20',
                         '-vsync', 'cfr',
                         
@@ -1187,20 +1665,16 @@ class OptimizedRTMPStreamer:
                         '-f', 'flv',
                         '-flvflags', 'no_duration_filesize',
                         '-fflags', '+genpts+discardcorrupt',
-                        '-max_interleave_delta', '0',  # Strict interleaving
+                        *_FFMPEG_MUX_ARGS,
                         self.rtmp_url
                     ])
                 else:
                     # Audio + Video mode for DirectShow
                     cmd.extend([
-                        # Audio encoding - RTMP standard AAC for system audio output
-                        '-c:a', 'aac',
-                        '-b:a', '128k',  # Standard AAC bitrate for good quality
-                        '-ar', '48000',  # Standard sample rate for system audio
-                        '-ac', '2',
+                        *_FFMPEG_AAC_ARGS,
                         
                         # MINIMAL PROCESSING - Let FFmpeg handle frame dropping natively
-                        '-vf', 'format=yuv420p,fps=20',    # Video: exact 20fps
+                        '-vf', self._nvenc_video_filter(),  # Video: exact 20fps
                         '-af', 'volume=0.8',               # Audio: volume only - no complex processing
                         
                         # Force output framerate
@@ -1213,175 +1687,48 @@ class OptimizedRTMPStreamer:
                         # Standard synchronization for system audio output capture
                         '-vsync', 'cfr',            # Constant frame rate
                         '-async', '1',              # Standard async for audio/video sync
-                        '-copyts',                  # Copy timestamps for proper sync
-                        '-start_at_zero',           # Start timestamps at zero
                         
                         # Output format
                         '-f', 'flv',
                         '-flvflags', 'no_duration_filesize',
                         '-fflags', '+genpts+discardcorrupt',
-                        '-max_interleave_delta', '0',  # Strict interleaving
+                        *_FFMPEG_MUX_ARGS,
                         self.rtmp_url
                     ])
             elif 'amf' in self.encoder:
                 # AMD AMF optimizations - RTMP compatible
                 cmd.extend([
-                    # Video encoding - RTMP compatible H.264 AMF
                     '-c:v', 'h264_amf',
-                    '-quality', 'balanced',      # Balanced quality for RTMP
-                    '-profile:v', 'main',        # RTMP standard profile
-                    '-level:v', '4.0',
-                    '-rc', 'cbr',                # Constant bitrate for RTMP
-                    '-b:v', '3000k',
-                    '-maxrate', '3000k',
-                    '-bufsize', '6000k',
-                    '-g', '40',                  # Keyframe every 2 seconds
-                    '-keyint_min', '20',
-                    
-                    # Audio encoding - RTMP standard AAC
-                    '-c:a', 'aac',
-                    '-b:a', '128k',
-                    '-ar', '48000',
-                    '-ac', '2',
-                    
-                    # Audio sync with drift compensation - Combined video and audio
-                    '-filter_complex',
-                    '[0:v]format=yuv420p,fps=20,setpts=N/20/TB[v];'
-                    '[1:a]aresample=async=1:min_hard_comp=0.100000:compensate_initial=1[a]',
-                    
-                    # Force output framerate
-                    '-r', '20',
-                    
-                    # Map processed streams
-                    '-map', '[v]',
-                    '-map', '[a]',
-                    
-                    # RTMP synchronization settings
-                    '-vsync', 'cfr',
-                    '-async', '1',
-                    
-                    # FLV container for RTMP
-                    '-f', 'flv',
-                    '-flvflags', 'no_duration_filesize',
-                    '-fflags', '+flush_packets',
-                    '-rtmp_live', 'live',
+                    *self.encoder_args,          # Ultra-low-latency usage
+                    *_FFMPEG_HW_CBR_ARGS,
+                    *_FFMPEG_AAC_ARGS,
+                    '-filter_complex', _FFMPEG_AMF_SYNC_FILTER,
+                    *_FFMPEG_HW_AV_OUTPUT_ARGS,
+                    *_FFMPEG_MUX_ARGS,
                     self.rtmp_url
                 ])
             elif 'qsv' in self.encoder:
                 # Intel Quick Sync optimizations - RTMP compatible
                 cmd.extend([
-                    # Video encoding - RTMP compatible H.264 QSV
                     '-c:v', 'h264_qsv',
-                    '-preset', 'fast',
-                    '-profile:v', 'main',        # RTMP standard profile
-                    '-level:v', '4.0',
-                    '-rc', 'cbr',                # Constant bitrate for RTMP
-                    '-b:v', '3000k',
-                    '-maxrate', '3000k',
-                    '-bufsize', '6000k',
-                    '-g', '40',                  # Keyframe every 2 seconds
-                    '-keyint_min', '20',
-                    
-                    # Audio encoding - RTMP standard AAC
-                    '-c:a', 'aac',
-                    '-b:a', '128k',
-                    '-ar', '48000',
-                    '-ac', '2',
-                    
-                    # Audio sync with drift compensation - Combined video and audio
-                    '-filter_complex',
-                    '[0:v]format=yuv420p,fps=20,setpts=N/20/TB[v];'
-                    '[1:a]aresample=async=1:min_hard_comp=0.100000:compensate_initial=1[a]',
-                    
-                    # Force output framerate
-                    '-r', '20',
-                    
-                    # Map processed streams
-                    '-map', '[v]',
-                    '-map', '[a]',
-                    
-                    # RTMP synchronization settings
-                    '-vsync', 'cfr',
-                    '-async', '1',
-                    
-                    # FLV container for RTMP
-                    '-f', 'flv',
-                    '-flvflags', 'no_duration_filesize',
-                    '-fflags', '+flush_packets',
-                    '-rtmp_live', 'live',
+                    *self.encoder_args,          # Fast preset, no lookahead, single-frame async depth
+                    *_FFMPEG_HW_CBR_ARGS,
+                    *_FFMPEG_AAC_ARGS,
+                    '-filter_complex', _FFMPEG_HW_SYNC_FILTER,
+                    *_FFMPEG_HW_AV_OUTPUT_ARGS,
+                    *_FFMPEG_MUX_ARGS,
                     self.rtmp_url
                 ])
             else:
                 # Software encoding with optimal settings
-                cmd.extend([
-                    '-c:v', 'libx264',
-                    '-preset', 'fast',           # Faster than ultrafast but better quality
-                    '-tune', 'zerolatency',
-                    '-crf', '18',                # Much higher quality
-                    '-maxrate', '6000k',         # Higher bitrate
-                    '-bufsize', '3000k',
-                    
-                    # Audio encoding - high quality AAC
-                    '-c:a', 'aac',
-                    '-b:a', '128k',
-                    '-ar', '48000',
-                    '-ac', '2',
-                    
-                    # Use filter_complex for precise sync - Combined video and audio
-                    '-filter_complex',
-                    '[0:v]format=yuv420p,fps=20,setpts=N/20/TB[v];'
-                    '[1:a]aresample=async=1:min_hard_comp=0.100000:first_pts=0[a]',
-                    
-                    # Force output framerate
-                    '-r', '20',
-                    
-                    '-map', '[v]',
-                    '-map', '[a]',
-                    
-                    # Synchronization settings for A/V sync
-                    '-async', '1',
-                    '-vsync', 'cfr',
-                    
-                    # Ultra-stable x264 parameters
-                    '-x264-params', 'aq-mode=0:ref=1:bframes=0:rc-lookahead=0:scenecut=0:keyint=40:min-keyint=20',
-                    '-g', '40',
-                    '-keyint_min', '20',
-                    '-profile:v', 'baseline',
-                    '-level', '3.0',
-                    
-                    # Force frame rate
-                    '-r', '20',
-                    '-force_fps',
-                    
-                    # Streaming optimizations with timestamp handling
-                    '-f', 'flv',
-                    '-flvflags', 'no_duration_filesize+no_metadata',
-                    '-fflags', '+flush_packets+genpts+igndts',
-                    '-max_delay', '100000',
-                    '-rtmp_live', 'live',
-                    self.rtmp_url
-                ])
+                cmd.extend([*_FFMPEG_X264_AV_ARGS, *_FFMPEG_MUX_ARGS, self.rtmp_url])
         else:
             # Video-only command remains the same
             cmd = [
                 'ffmpeg', '-y',
-                '-f', 'image2pipe',
-                '-vcodec', 'mjpeg',
-                '-framerate', '20',
-                '-i', 'pipe:0',
-                '-c:v', 'libx264',
-                '-preset', 'ultrafast',
-                '-tune', 'zerolatency',
-                '-crf', '30',
-                '-maxrate', '1200k',
-                '-bufsize', '600k',
-                '-vf', 'format=yuv420p',
-                '-r', '20',
-                '-vsync', 'cfr',
-                '-x264-params', 'keyint=40:min-keyint=20:bframes=0',
-                '-f', 'flv',
-                '-flvflags', 'no_duration_filesize',
-                '-fflags', '+genpts',
+                *self._video_input_args(),
+                *_FFMPEG_X264_VIDEO_ONLY_ARGS,
+                *_FFMPEG_MUX_ARGS,
                 self.rtmp_url
             ]
         
@@ -1395,28 +1742,48 @@ class OptimizedRTMPStreamer:
             return
             
         logger.info("Raw frame processing started - Maximum quality mode")
+        if self.real_time:
+            _boost_thread_priority()
         
-        while self.running and self.raw_frame_receiver:
-            raw_frame = self.raw_frame_receiver.get_raw_frame(timeout=0.01)
+        while self.running:
+            # Blocks until a frame arrives; stop() pushes a None sentinel to end the loop
+            raw_frame = self.raw_frame_receiver.get_raw_frame(timeout=None)
+            if raw_frame is None:
+                break
             
-            if raw_frame and self.process and self.process.stdin:
+            if self.process and self.process.stdin:
                 try:
                     # Check if FFmpeg process is still alive
-                    if self.process.poll() is not None:
-                        logger.error(f"FFmpeg process died with return code: {self.process.returncode}")
+                    if not self._ffmpeg_alive:
+                        logger.error(f"FFmpeg process died with return code: {self._ffmpeg_rc}")
                         break
                     
+                    # Every branch hands the reassembly buffer back once it is done with it
+                    release = self.raw_frame_receiver.release_frame
+                    
                     # Send frame data through the standard send_frame method
-                    if raw_frame['format'] == FrameFormat.RGB24:
+                    if raw_frame['format'] == FrameFormat.RGB24 and not self.raw_yuv_size:
                         # Unreal Engine is actually sending JPEG data on the "raw" port
                         # Send through standard pipeline for proper statistics tracking
-                        if self.send_frame(raw_frame['data']):
+                        if self.send_frame(raw_frame['data'], release=release):
                             self.raw_frames_sent += 1
                         
                         # Log progress
                         if self.raw_frames_sent % 100 == 0 and self.raw_frames_sent > 0:
                             logger.info(f"Raw frames processed: {self.raw_frames_sent}")
+                    elif raw_frame['format'] == FrameFormat.YUV420 and self.raw_yuv_size:
+                        # Raw YUV420 goes straight to the rawvideo input, no JPEG wrapping
+                        if self.send_raw_frame(raw_frame['data'], raw_frame['width'], raw_frame['height'],
+                                               release=release):
+                            self.raw_frames_sent += 1
+                    elif raw_frame['format'] == FrameFormat.RGB24 and self._turbojpeg:
+                        # JPEG on the raw port: decode once with libjpeg-turbo and feed the rawvideo input
+                        yuv_data, width, height = self._decode_jpeg_to_yuv420(raw_frame['data'])
+                        release(raw_frame['data'])  # Decoded into a separate buffer
+                        if yuv_data is not None and self.send_raw_frame(yuv_data, width, height):
+                            self.raw_frames_sent += 1
                     else:
+                        release(raw_frame['data'])
                         # Log send_frame failures for debugging
                         logger.error(f"Failed to send raw frame {raw_frame['frame_id']}")
                     
@@ -1427,20 +1794,34 @@ class OptimizedRTMPStreamer:
                     if self.running:
                         logger.error(f"Raw frame processing error: {e}")
                         # Check FFmpeg stderr for clues
-                        if hasattr(self, '_last_ffmpeg_error'):
-                            logger.error(f"Last FFmpeg error: {self._last_ffmpeg_error}")
+                        if self._last_ffmpeg_error:
+                            logger.error(f"Last FFmpeg error: {_decode_line(self._last_ffmpeg_error)}")
                     break
         
         logger.info(f"Raw frame processing stopped - {self.raw_frames_sent} frames processed")
     
+    def _decode_jpeg_to_yuv420(self, jpeg_data):
+        """Decode a 4:2:0 JPEG to planar YUV420 without an RGB round trip; (None, 0, 0) if unusable"""
+        try:
+            width, height, subsample, _ = self._turbojpeg.decode_header(jpeg_data)
+            if subsample != TJSAMP_420:
+                logger.error(f"Raw-port JPEG is not 4:2:0 (subsampling {subsample}) - cannot feed the YUV420 input")
+                self.frames_failed += 1
+                return None, 0, 0
+            yuv_data, _ = self._turbojpeg.decode_to_yuv(jpeg_data, pad=1)
+            return yuv_data, width, height
+        except Exception as e:
+            logger.error(f"JPEG decode error: {e}")
+            self.frames_failed += 1
+            return None, 0, 0
+    
     def _handle_compressed_frame_data(self, frame_data):
         """Handle compressed frame data sent on raw frame port"""
         try:
             # The data is JPEG compressed, so we need to send it to the MJPEG input pipeline
             # instead of the raw RGB24 pipeline
-            if hasattr(self, '_jpeg_process') and self._jpeg_process and self._jpeg_process.stdin:
-                self._jpeg_process.stdin.write(frame_data)
-                self._jpeg_process.stdin.flush()
+            if self._jpeg_process and self._jpeg_process.stdin:
+                _write_all(self._jpeg_process.stdin.fileno(), frame_data)
                 self.raw_frames_sent += 1
             else:
                 # If no separate JPEG process, log the issue
@@ -1521,12 +1902,9 @@ class OptimizedRTMPStreamer:
                 
                 if self.wasapi_running:
                     try:
-                        # Convert float32 to int16 PCM (standard format)
-                        audio_data = (indata * 32767).astype(np.int16)
-                        
-                        # Track audio statistics
+                        # Track audio statistics - int16 PCM size, no conversion needed to count it
                         self.audio_chunks_sent += 1
-                        self.audio_bytes_sent += len(audio_data.tobytes())
+                        self.audio_bytes_sent += indata.size * 2
                         
                         # For now, just track that we're receiving audio
                         # In a full implementation, this would feed to FFmpeg
@@ -1582,11 +1960,8 @@ class OptimizedRTMPStreamer:
                 
                 if self.wasapi_running:
                     try:
-                        # Convert float32 to int16 PCM
-                        audio_data = (indata * 32767).astype(np.int16)
-                        
-                        # Write directly to FIFO for FFmpeg consumption
-                        audio_file.write(audio_data.tobytes())
+                        # indata is already int16 PCM - write its buffer directly to FIFO for FFmpeg consumption
+                        audio_file.write(indata)
                         audio_file.flush()
                         
                         # Track statistics
@@ -1605,7 +1980,7 @@ class OptimizedRTMPStreamer:
                 channels=2,
                 samplerate=48000,
                 blocksize=1024,  # ~21ms blocks 
-                dtype=np.float32,
+                dtype='int16',  # PortAudio converts to PCM - nothing to do in the callback
                 callback=audio_sync_callback,
                 latency='low'
             ) as stream:
@@ -1639,52 +2014,59 @@ class OptimizedRTMPStreamer:
             
         logger.info("WASAPI audio capture stopped")
     
-    def send_frame(self, jpeg_data):
-        """Send JPEG frame with adaptive timing to prevent drift accumulation"""
-        if not self.running or not self.process:
-            return False
+    def send_frame(self, jpeg_data, pace=True, release=None):
+        """Send JPEG frame with adaptive timing to prevent drift accumulation.
         
-        # Initialize timing on first frame
-        if not hasattr(self, 'last_frame_time'):
-            self.last_frame_time = time.time()
-            self.frame_number = 0
+        pace=False skips the timing for callers that already pace (FrameCadencer).
+        release, if given, is called with jpeg_data once the frame has been
+        written or rejected, so its reassembly buffer can be reused.
+        """
+        try:
+            return self._send_jpeg(jpeg_data, pace)
+        finally:
+            if release is not None and jpeg_data is not None:
+                release(jpeg_data)
+    
+    def _send_jpeg(self, jpeg_data, pace):
+        """Pace, validate and write one JPEG frame"""
+        if not self.running:  # only set once the FFmpeg process and its stdin fd exist
+            return False
         
         # Adaptive frame timing - based on last frame instead of absolute start time
-        frame_duration = 1.0 / 20.0  # 50ms per frame at 20fps
-        current_time = time.time()
-        
-        # Calculate when next frame should be sent based on last frame
-        target_time = self.last_frame_time + frame_duration
-        
-        # If we're ahead, wait (but limit max wait to prevent accumulation)
-        if current_time < target_time:
-            sleep_time = min(target_time - current_time, 0.030)  # Max 30ms wait
-            if sleep_time > 0.001:  # Only sleep if more than 1ms
-                time.sleep(sleep_time)
-        
-        # If we're behind, adjust timing to prevent permanent drift
-        elif current_time - target_time > 0.100:  # More than 100ms behind
-            drift = current_time - target_time
-            logger.warning(f"WARNING: Large timing drift detected: {drift*1000:.1f}ms - resetting timing")
-            # Reset timing to current time to prevent permanent drift accumulation
-            self.last_frame_time = current_time - frame_duration
+        if pace and self.last_frame_time_ns:
+            now = time.monotonic_ns()
+            
+            # Calculate when next frame should be sent based on last frame
+            target_ns = self.last_frame_time_ns + self._target_interval_ns
+            
+            # If we're ahead, wait (but limit max wait to prevent accumulation)
+            if now < target_ns:
+                sleep_ns = min(target_ns - now, 30_000_000)  # Max 30ms wait
+                if sleep_ns > 1_000_000:  # Only sleep if more than 1ms
+                    time.sleep(sleep_ns / 1e9)
+            
+            # If we're behind, adjust timing to prevent permanent drift
+            elif now - target_ns > 100_000_000:  # More than 100ms behind
+                drift_ms = (now - target_ns) / 1e6
+                logger.warning(f"WARNING: Large timing drift detected: {drift_ms:.1f}ms - resetting timing")
+                # Reset timing to current time to prevent permanent drift accumulation
+                self.last_frame_time_ns = now - self._target_interval_ns
         
         # Validate and send frame
         if not jpeg_data or len(jpeg_data) < 10:
             self.frames_failed += 1
             return False
         
-        if jpeg_data[0] != 0xFF or jpeg_data[1] != 0xD8:
-            logger.error(f"Invalid JPEG header")
+        if jpeg_data[:2] != JPEG_SOI:
+            logger.error("Invalid JPEG header: %s", bytes(jpeg_data[:2]).hex())
             self.frames_failed += 1
             return False
         
         try:
-            self.process.stdin.write(jpeg_data)
-            self.process.stdin.flush()
+            _write_all(self._stdin_fd, jpeg_data)
             self.frames_sent += 1
             self.frame_number += 1
-            self.last_frame_time = time.time()
+            self.last_frame_time_ns = time.monotonic_ns()
             return True
         except Exception as e:
             logger.error(f"Frame send error: {e}")
@@ -1692,6 +2074,37 @@ class OptimizedRTMPStreamer:
             self.running = False
             return False
     
+    def send_raw_frame(self, yuv_data, width, height, release=None):
+        """Send one raw YUV420 frame matching the size the FFmpeg input was built for.
+        
+        release works as in send_frame.
+        """
+        try:
+            return self._send_yuv420(yuv_data, width, height)
+        finally:
+            if release is not None:
+                release(yuv_data)
+    
+    def _send_yuv420(self, yuv_data, width, height):
+        """Validate and write one raw YUV420 frame"""
+        if not self.running:
+            return False
+        
+        if (width, height) != self.raw_yuv_size or len(yuv_data) != width * height * 3 // 2:
+            logger.error(f"Raw YUV420 frame {width}x{height} ({len(yuv_data)} bytes) does not match {self.raw_yuv_size}")
+            self.frames_failed += 1
+            return False
+        
+        try:
+            _write_all(self._stdin_fd, yuv_data)
+            self.frames_sent += 1
+            return True
+        except Exception as e:
+            logger.error(f"Raw frame send error: {e}")
+            self.frames_failed += 1
+            self.running = False
+            return False
+    
     def get_statistics(self):
         """Get streaming statistics with RTMP connection status"""
         elapsed = time.time() - self.start_time
@@ -1700,9 +2113,8 @@ class OptimizedRTMPStreamer:
         
         # Get WASAPI audio chunks if using WASAPI
         wasapi_chunks = 0
-        if (hasattr(self, 'audio_device') and self.audio_device and 
-            self.audio_device.startswith("WASAPI:") and hasattr(self, 'audio_chunks_sent')):
-            wasapi_chunks = getattr(self, 'audio_chunks_sent', 0)
+        if self.audio_device and self.audio_device.startswith("WASAPI:"):
+            wasapi_chunks = self.audio_chunks_sent
         
         return {
             'frames_sent': self.frames_sent,
@@ -1724,12 +2136,13 @@ class OptimizedRTMPStreamer:
         self.running = False
         
         # Stop WASAPI capture if using Line In
-        if hasattr(self, 'audio_device') and self.audio_device and self.audio_device.startswith("WASAPI:"):
+        if self.audio_device and self.audio_device.startswith("WASAPI:"):
             self.stop_wasapi_capture()
         
-        # Stop raw frame receiver
+        # Stop raw frame receiver, then release the blocked raw frame loop
         if self.raw_frame_receiver:
             self.raw_frame_receiver.stop()
+            self.raw_frame_receiver.put_sentinel()
         
         # Stop FFmpeg process
         if self.process:
@@ -1748,7 +2161,8 @@ class ProductionWebRTCBridge:
     def __init__(self, config: LivepeerConfig, audio_config: AudioConfig = None):
         self.config = config
         self.audio_config = audio_config or AudioConfig()
-        self.frame_receiver = ProductionFrameReceiver(port=5000)
+        self.frame_receiver = ProductionFrameReceiver(port=5000, real_time=config.real_time)
+        self.frame_cadencer = FrameCadencer(self.frame_receiver)
         self.rtmp_streamer = None
         self.running = False
         
@@ -1767,7 +2181,7 @@ class ProductionWebRTCBridge:
         
         # Create RTMP streamer first to check raw frame settings
         rtmp_url = f"{self.config.rtmp_url}/{self.config.stream_key}"
-        self.rtmp_streamer = OptimizedRTMPStreamer(rtmp_url, self.audio_config)
+        self.rtmp_streamer = OptimizedRTMPStreamer(rtmp_url, self.audio_config, real_time=self.config.real_time)
         
         # Start frame receiver (only if not using raw frames)
         if not self.rtmp_streamer.use_raw_frames:
@@ -1790,15 +2204,18 @@ class ProductionWebRTCBridge:
     def _main_loop(self):
         """Main processing loop with comprehensive monitoring"""
         logger.info("Production processing loop started (with synchronized audio)")
+        if self.config.real_time:
+            _boost_thread_priority()
         
         try:
             while self.running:
                 # Get frame from receiver (works for both regular and raw frames now)
                 if not self.rtmp_streamer.use_raw_frames:
-                    frame_data = self.frame_receiver.get_frame(timeout=0.01)
+                    frame_data = self.frame_cadencer.next_frame()
                     
                     if frame_data and self.rtmp_streamer:
-                        self.rtmp_streamer.send_frame(frame_data)
+                        # The cadencer already holds frames to their slots
+                        self.rtmp_streamer.send_frame(frame_data, pace=False)
                 else:
                     # Raw frames are handled in _raw_frame_loop via send_frame()
                     time.sleep(0.01)
@@ -1838,6 +2255,7 @@ class ProductionWebRTCBridge:
         logger.info(f"Frames Completed: {receiver_stats['frames_completed']}")
         logger.info(f"Frames Dropped: {receiver_stats['frames_dropped']}")
         logger.info(f"Incomplete Frames: {receiver_stats['incomplete_frames']}")
+        logger.info(f"Cadence Repeats/Skips: {self.frame_cadencer.frames_repeated}/{self.frame_cadencer.frames_skipped}")
         logger.info(f"Quality Score: {min(receiver_stats['success_rate'], streamer_stats['success_rate']):.1f}%")
         logger.info("=====================================")
         
@@ -1873,7 +2291,7 @@ def main():
         format_bits=16
     )
     
-    config = LivepeerConfig()
+    config = LivepeerConfig(real_time=os.environ.get('MANNEQUIN_REAL_TIME') == '1')
     bridge = ProductionWebRTCBridge(config, audio_config)
     
     try: